@@ -1,49 +1,208 @@
 import os
 import logging
+import sqlite3
+from collections.abc import Mapping
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+from routing import RoutingSession, REPLICA_BIND
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///boarding_house.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# Initialize extensions
-db.init_app(app)
-login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and so ON DELETE CASCADE, when asked to on each connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+def _is_sqlite_file(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def sqlite_pragmas(config):
+    """Connection settings of the SQLite production profile"""
+    return {
+        # Readers see the last committed snapshot instead of waiting for the writer, and it for them
+        'journal_mode': 'WAL',
+        # In WAL mode a crash can lose the last commits but never corrupts the file
+        'synchronous': 'NORMAL',
+        'busy_timeout': config["SQLITE_BUSY_TIMEOUT_MS"],
+        'mmap_size': config["SQLITE_MMAP_SIZE"],
+        'cache_size': -config["SQLITE_CACHE_SIZE_KB"],  # negative means KiB rather than pages
+    }
+
+def apply_sqlite_profile(engine, config):
+    """Set the production pragmas on every new connection of a SQLite file engine"""
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        for name, value in pragmas.items():
+            dbapi_connection.execute(f'PRAGMA {name}={value}')
+
+def engine_options(url, config):
+    """create_engine() options for one database, with pool limits from the config"""
+    options = {"pool_recycle": 300, "pool_pre_ping": True}
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and not _is_sqlite_file(url):
+        return options  # in-memory databases use a single static connection
+    from metrics import TimedQueuePool  # metrics imports this module
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    if _is_sqlite_file(url) and config["SQLITE_PROFILE"] == "production":
+        # A file connection never goes stale, so skip the ping and keep connections and their page cache
+        options.update(pool_pre_ping=False, pool_recycle=-1)
+    return options
+
+def configure_engines(app):
+    """Fill in per-database engine options and the replica bind before the engines are created"""
+    config = app.config
+    extra = config["SQLALCHEMY_ENGINE_OPTIONS"]
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {**engine_options(config["SQLALCHEMY_DATABASE_URI"], config), **extra}
+    replica = config["DATABASE_REPLICA_URL"]
+    if replica:
+        config["SQLALCHEMY_BINDS"] = {
+            **config.get("SQLALCHEMY_BINDS", {}),
+            REPLICA_BIND: {"url": replica, **engine_options(replica, config), **extra},
+        }
+
+class Config:
+    """Defaults, read from the environment; create_app(config) overrides any of them"""
+    SECRET_KEY = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///boarding_house.db")
+    # Extra create_engine() options; pool settings come from the DB_POOL_* values per database
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))  # seconds to wait for a free connection
+    # Read-only routes (reports, APIs, listings) query this database instead when set
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+    # "production" runs SQLite files in WAL mode with the pragmas below, so readers stop blocking on writers
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "default")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Root log level, plus per-logger overrides such as "sqlalchemy.engine=INFO,reminders=DEBUG"
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+    # Per-owner cache; CACHE_URL may point at redis:// for a shared backend or memory:// for tests
+    CACHE_URL = os.environ.get("CACHE_URL")
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+    # Logged-in user cache; each worker may serve a changed username for up to USER_CACHE_TTL seconds
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", 4096))
+    # Raise instead of querying when a listing falls back to per-row property queries
+    STRICT_BATCH_LOADING = os.environ.get("STRICT_BATCH_LOADING") == "1"
+    # Request instrumentation: slow-query log threshold, N+1 warning threshold, Server-Timing header
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", 10))
+    SERVER_TIMING = os.environ.get("SERVER_TIMING", "1") == "1"
+    # Metrics: METRICS_DIR shares /metrics across gunicorn workers; /metrics is closed unless METRICS_TOKEN is set
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    # Payment reminders; REMINDER_SMTP_HOST may be memory:// for tests, unset logs messages instead
+    REMINDER_SMTP_HOST = os.environ.get("REMINDER_SMTP_HOST")
+    REMINDER_SMTP_PORT = int(os.environ.get("REMINDER_SMTP_PORT", 25))
+    REMINDER_SMTP_USER = os.environ.get("REMINDER_SMTP_USER")
+    REMINDER_SMTP_PASSWORD = os.environ.get("REMINDER_SMTP_PASSWORD")
+    REMINDER_SMTP_STARTTLS = os.environ.get("REMINDER_SMTP_STARTTLS") == "1"
+    REMINDER_FROM = os.environ.get("REMINDER_FROM", "noreply@boardinghouse.com")
+    REMINDER_DAYS_AHEAD = int(os.environ.get("REMINDER_DAYS_AHEAD", 3))
+    REMINDER_WORKERS = int(os.environ.get("REMINDER_WORKERS", 8))
+    REMINDER_MAX_ATTEMPTS = int(os.environ.get("REMINDER_MAX_ATTEMPTS", 5))
+    REMINDER_RATE_LIMITS = os.environ.get("REMINDER_RATE_LIMITS", "email=10,sms=1")  # sends per second
+    TWILIO_SID = os.environ.get("TWILIO_SID")
+    TWILIO_TOKEN = os.environ.get("TWILIO_TOKEN")
+    TWILIO_PHONE = os.environ.get("TWILIO_PHONE")
+    # Background jobs, in seconds; unset disables the thread
+    OVERDUE_SWEEP_INTERVAL = int(os.environ.get("OVERDUE_SWEEP_INTERVAL", 0))
+    REMINDER_DISPATCH_INTERVAL = int(os.environ.get("REMINDER_DISPATCH_INTERVAL", 0))
+
+def configure_logging(app):
+    logging.basicConfig(level=app.config["LOG_LEVEL"].upper())
+    logging.getLogger().setLevel(app.config["LOG_LEVEL"].upper())
+    for item in filter(None, (part.strip() for part in app.config["LOG_LEVELS"].split(","))):
+        name, level = item.split("=")
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    from identity import load_identity
+    return load_identity(int(user_id))
+
+def create_app(config=None):
+    """Build the application; `config` is a mapping or object overriding Config.
+
+    Nothing here touches the database: the schema is created and migrated
+    by `flask db upgrade`, and background threads are started separately
+    by start_background_jobs() so a preloading server can fork first.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, Mapping):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+    configure_logging(app)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+    # Initialize extensions
+    configure_engines(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    if app.config["SQLITE_PROFILE"] == "production":
+        with app.app_context():
+            for engine in db.engines.values():
+                if _is_sqlite_file(engine.url):
+                    apply_sqlite_profile(engine, app.config)
+
+    import models  # register the tables on db.metadata
+    import reports  # rollup maintenance listeners
+    import versions  # data version listeners
+    import cache
+    import identity
+    import instrumentation
+    import metrics
+    import routing
+    cache.owner_cache.init_app(app)
+    identity.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    routing.init_app(app)
+
+    from blueprints import auth, rooms, tenants, payments, reports as reports_views, imports, search, api
+    for module in (auth, rooms, tenants, payments, reports_views, imports, search, api):
+        app.register_blueprint(module.bp)
 
-with app.app_context():
-    # Import models to ensure tables are created
-    import models
-    db.create_all()
+    # Background jobs and maintenance commands
+    import sweeper, billing, reminders, importer, migrate, seeding, bench
+    for command in (sweeper.sweep_overdue_command, reports.rebuild_rollups_command, migrate.db_command,
+                    billing.generate_invoices_command, reminders.send_reminders_command,
+                    importer.import_csv_command, seeding.seed_data_command, bench.bench_command):
+        app.cli.add_command(command)
+    return app
 
-# Import routes
-from routes import *
+def start_background_jobs(app):
+    """Start the configured scheduler threads; call once per serving process"""
+    import sweeper, reminders
+    if app.config["OVERDUE_SWEEP_INTERVAL"]:
+        sweeper.start_scheduler(app, app.config["OVERDUE_SWEEP_INTERVAL"])
+    if app.config["REMINDER_DISPATCH_INTERVAL"]:
+        reminders.start_dispatcher(app, app.config["REMINDER_DISPATCH_INTERVAL"])
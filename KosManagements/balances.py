@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from sqlalchemy import select, func, case
+from app import db
+from models import Payment
+
+AGING_BUCKETS = ('0-30', '31-60', '61-90', '90+')
+
+@dataclass
+class TenantBalance:
+    paid: float = 0.0
+    pending: float = 0.0
+    overdue: float = 0.0
+    aging: dict = field(default_factory=lambda: dict.fromkeys(AGING_BUCKETS, 0.0))
+
+    @property
+    def outstanding(self):
+        return self.pending + self.overdue
+
+def _sum_if(condition):
+    return func.coalesce(func.sum(case((condition, Payment.amount), else_=0)), 0)
+
+def _balance_columns(today):
+    unpaid = Payment.status.in_(('pending', 'overdue'))
+    late = unpaid & (Payment.due_date < today)
+    cutoffs = [today - timedelta(days=days) for days in (30, 60, 90)]
+    return [
+        _sum_if(Payment.status == 'paid').label('paid'),
+        _sum_if(unpaid & (Payment.due_date >= today)).label('pending'),
+        _sum_if(late).label('overdue'),
+        _sum_if(late & (Payment.due_date >= cutoffs[0])).label('aged_0_30'),
+        _sum_if(late & (Payment.due_date < cutoffs[0]) & (Payment.due_date >= cutoffs[1])).label('aged_31_60'),
+        _sum_if(late & (Payment.due_date < cutoffs[1]) & (Payment.due_date >= cutoffs[2])).label('aged_61_90'),
+        _sum_if(late & (Payment.due_date < cutoffs[2])).label('aged_90_plus'),
+    ]
+
+def _to_balance(row):
+    return TenantBalance(
+        paid=float(row.paid),
+        pending=float(row.pending),
+        overdue=float(row.overdue),
+        aging=dict(zip(AGING_BUCKETS, map(float, (row.aged_0_30, row.aged_31_60, row.aged_61_90, row.aged_90_plus)))),
+    )
+
+def get_tenant_balances(tenant_ids, today=None):
+    """Paid, pending, overdue and arrears aging per tenant in one grouped query"""
+    tenant_ids = list(tenant_ids)
+    if not tenant_ids:
+        return {}
+    rows = db.session.execute(
+        select(Payment.tenant_id, *_balance_columns(today or date.today()))
+        .where(Payment.tenant_id.in_(tenant_ids))
+        .group_by(Payment.tenant_id)
+    ).all()
+    balances = {tenant_id: TenantBalance() for tenant_id in tenant_ids}
+    balances.update((row.tenant_id, _to_balance(row)) for row in rows)
+    return balances
+
+def get_owner_aging(user_id, today=None):
+    """Arrears aging report across all of one owner's tenants"""
+    row = db.session.execute(
+        select(*_balance_columns(today or date.today()))
+        .where(Payment.user_id == user_id)
+    ).one()
+    return _to_balance(row)
+
+def load_tenant_balances(tenants, today=None):
+    """Attach total_paid and outstanding_amount to a page of tenants"""
+    tenants = list(tenants)
+    balances = get_tenant_balances([t.id for t in tenants], today)
+    for tenant in tenants:
+        tenant.balance = balances[tenant.id]
+        tenant._total_paid = tenant.balance.paid
+        tenant._outstanding_amount = tenant.balance.outstanding
+    return balances
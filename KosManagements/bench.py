@@ -0,0 +1,127 @@
+import contextvars
+import time
+from dataclasses import dataclass, field
+
+import click
+from sqlalchemy import event, select, func
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from models import User, Payment
+from cache import owner_cache
+
+# endpoint, path, most queries one request may issue with a cold owner cache (the user comes from the identity cache)
+ROUTES = [
+    ('reports.dashboard', '/dashboard', 5),
+    ('rooms.index', '/rooms', 4),
+    ('tenants.index', '/tenants', 3),
+    ('payments.index', '/payments', 1),
+    ('reports.financial', '/reports/financial', 8),
+    ('api.revenue_data', '/api/dashboard/revenue-data', 2),
+]
+
+@dataclass
+class RouteResult:
+    endpoint: str
+    path: str
+    budget: int
+    latencies: list = field(default_factory=list)  # seconds
+    queries: list = field(default_factory=list)
+    statuses: set = field(default_factory=set)
+
+    def percentile(self, pct):
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def max_queries(self):
+        return max(self.queries)
+
+    @property
+    def failures(self):
+        problems = []
+        if self.max_queries > self.budget:
+            problems.append(f'{self.max_queries} queries, budget {self.budget}')
+        if self.statuses != {200}:
+            problems.append(f'status {", ".join(map(str, sorted(self.statuses)))}')
+        return problems
+
+def busiest_owner():
+    """The owner with the most payments, whose pages are the slowest"""
+    return db.session.scalar(
+        select(Payment.user_id).group_by(Payment.user_id).order_by(func.count().desc()).limit(1)
+    ) or db.session.scalar(select(func.min(User.id)))
+
+def run_benchmark(user_id, iterations=20, warmup=2, cold=False, routes=ROUTES):
+    """Request every route through the test client and measure it.
+
+    Queries are counted on the engine for each request. With `cold`, the
+    owner cache is invalidated before every request so each one does the
+    full work; otherwise only warmup requests fill it.
+    """
+    app = current_app._get_current_object()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    counter = {'queries': 0}
+
+    def count(*args):
+        counter['queries'] += 1
+
+    engines = list(db.engines.values())  # the replica too, when read-only routes use it
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', count)
+    strict = app.config['STRICT_BATCH_LOADING']
+    app.config['STRICT_BATCH_LOADING'] = True
+    results = []
+    try:
+        for endpoint, path, budget in routes:
+            result = RouteResult(endpoint, path, budget)
+            for i in range(warmup + iterations):
+                if cold:
+                    owner_cache.bump(user_id)
+                counter['queries'] = 0
+                started = time.perf_counter()
+                # A fresh context, so the request gets its own app context, g and session
+                # even when called from inside one (e.g. `flask bench`)
+                response = contextvars.Context().run(client.get, path)
+                elapsed = time.perf_counter() - started
+                if i < warmup:
+                    continue
+                result.latencies.append(elapsed)
+                result.queries.append(counter['queries'])
+                result.statuses.add(response.status_code)
+            results.append(result)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', count)
+        app.config['STRICT_BATCH_LOADING'] = strict
+    return results
+
+@click.command('bench')
+@with_appcontext
+@click.option('--user-id', type=int, help='Owner to browse as (default: the one with the most payments).')
+@click.option('--iterations', default=20, show_default=True, help='Measured requests per route.')
+@click.option('--warmup', default=2, show_default=True, help='Unmeasured requests per route first.')
+@click.option('--cold', is_flag=True, help='Invalidate the owner cache before every request.')
+def bench_command(user_id, iterations, warmup, cold):
+    """Measure latency and query counts of the main pages; fail over query budget."""
+    user_id = user_id or busiest_owner()
+    if user_id is None:
+        raise click.UsageError('No users; run `flask seed-data` first')
+    results = run_benchmark(user_id, iterations, warmup, cold)
+
+    click.echo(f'{"endpoint":<20}{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}{"max ms":>9}{"queries":>9}{"budget":>8}')
+    failed = False
+    for result in results:
+        click.echo(f'{result.endpoint:<20}'
+                   + ''.join(f'{result.percentile(pct) * 1000:>9.1f}' for pct in (50, 90, 99, 100))
+                   + f'{result.max_queries:>9}{result.budget:>8}')
+        for problem in result.failures:
+            failed = True
+            click.echo(f'  FAIL {result.endpoint}: {problem}', err=True)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,129 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import select, insert, literal, and_, or_, exists
+from flask.cli import with_appcontext
+from app import db
+from models import Room, Tenant, Payment
+from reports import month_start, add_months
+from cache import owner_cache
+from versions import bump_versions, GLOBAL
+from metrics import track_job
+
+INSERT_CHUNK = 5000
+
+def next_period(today=None):
+    return add_months(month_start(today or date.today()), 1)
+
+def parse_period(value):
+    """Parse 'YYYY-MM' into the first day of that month"""
+    try:
+        year, month = map(int, value.split('-'))
+        return date(year, month, 1)
+    except ValueError as exc:
+        raise ValueError(f'Invalid billing period {value!r}, expected YYYY-MM') from exc
+
+def prorated_amount(monthly_rent, start_date, end_date, period):
+    """Rent for the part of `period` covered by [start_date, end_date]"""
+    days_in_month = calendar.monthrange(period.year, period.month)[1]
+    period_end = period + timedelta(days=days_in_month - 1)
+    first = max(start_date, period)
+    last = min(end_date or period_end, period_end)
+    occupied = (last - first).days + 1
+    if occupied <= 0:
+        return 0.0
+    return round(monthly_rent * occupied / days_in_month, 2)
+
+def _not_invoiced(period):
+    return ~exists().where(Payment.tenant_id == Tenant.id, Payment.billing_period == period)
+
+@track_job('generate_invoices')
+def generate_invoices(period, user_id=None):
+    """Create pending rent payments for every active tenant for one month.
+
+    Tenants who occupy the whole month are billed with a single
+    INSERT ... SELECT; the few who move in or out during the month are
+    prorated in Python and inserted in chunks. Tenants that already have an
+    invoice for the period are skipped, so re-running is a no-op.
+    Returns the number of payments created.
+    """
+    period = month_start(period)
+    period_end = add_months(period, 1) - timedelta(days=1)
+    now = datetime.utcnow()
+    overlaps = and_(
+        Tenant.is_active == True,
+        Tenant.start_date <= period_end,
+        or_(Tenant.end_date == None, Tenant.end_date >= period),
+        _not_invoiced(period),
+    )
+    if user_id is not None:
+        overlaps = and_(overlaps, Tenant.user_id == user_id)
+    full_month = and_(Tenant.start_date <= period, or_(Tenant.end_date == None, Tenant.end_date >= period_end))
+    notes = f'Rent {period:%B %Y}'
+
+    full = db.session.execute(
+        insert(Payment).from_select(
+            ['amount', 'due_date', 'status', 'notes', 'billing_period', 'created_at', 'room_id', 'tenant_id', 'user_id'],
+            select(
+                Room.monthly_rent,
+                literal(period),
+                literal('pending'),
+                literal(notes),
+                literal(period),
+                literal(now),
+                Tenant.room_id,
+                Tenant.id,
+                Tenant.user_id,
+            ).join(Room, Tenant.room_id == Room.id).where(overlaps, full_month)
+        )
+    ).rowcount
+
+    partial = db.session.execute(
+        select(Tenant.id, Tenant.room_id, Tenant.user_id, Tenant.start_date, Tenant.end_date, Room.monthly_rent)
+        .join(Room, Tenant.room_id == Room.id)
+        .where(overlaps, ~full_month)
+    ).all()
+    rows = []
+    for tenant in partial:
+        amount = prorated_amount(tenant.monthly_rent, tenant.start_date, tenant.end_date, period)
+        if amount <= 0:
+            continue
+        rows.append({
+            'amount': amount,
+            'due_date': max(tenant.start_date, period),
+            'status': 'pending',
+            'notes': f'{notes} (prorated)',
+            'billing_period': period,
+            'created_at': now,
+            'room_id': tenant.room_id,
+            'tenant_id': tenant.id,
+            'user_id': tenant.user_id,
+        })
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(Payment), rows[i:i + INSERT_CHUNK])
+
+    created = full + len(rows)
+    if created:
+        # The inserts bypass the ORM, so invalidate cached owner data explicitly
+        bump_versions(db.session.connection(), [user_id if user_id is not None else GLOBAL])
+    db.session.commit()
+    if created:
+        if user_id is not None:
+            owner_cache.bump(user_id)
+        else:
+            owner_cache.bump_all()
+    return created
+
+@click.command('generate-invoices')
+@with_appcontext
+@click.option('--period', help='Month to bill as YYYY-MM (default: next month).')
+@click.option('--user-id', type=int, help='Only bill this owner.')
+def generate_invoices_command(period, user_id):
+    """Create pending rent payments for all active tenants."""
+    try:
+        period = parse_period(period) if period else next_period()
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint='--period')
+    created = generate_invoices(period, user_id)
+    click.echo(f'Created {created} invoice(s) for {period:%B %Y}')
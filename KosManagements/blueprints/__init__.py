@@ -0,0 +1 @@
+"""Route blueprints, one per subsystem"""
@@ -0,0 +1,97 @@
+from datetime import date, datetime, time
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from routing import read_only
+from stats import get_dashboard_stats
+from reports import monthly_revenue, month_start
+from cache import owner_cache
+from versions import data_version, is_not_modified
+from balances import get_owner_aging
+from occupancy import trailing_occupancy, GRANULARITIES
+from forecast import cash_flow_forecast, FORECAST_MONTHS
+from lookups import available_rooms, active_tenants, TYPEAHEAD_LIMIT
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+# Dashboard charts
+@bp.route('/dashboard/revenue-data')
+@read_only
+@login_required
+def revenue_data():
+    user_id = current_user.id
+    months = min(max(request.args.get('months', 6, type=int), 1), 120)
+    
+    # The window moves with the calendar month, so the validators change with it even without writes
+    month = month_start(date.today())
+    etag, last_modified = data_version(user_id)
+    etag = f'{etag}.{months}.{month:%Y-%m}'
+    last_modified = max(filter(None, (last_modified, datetime.combine(month, time.min))))
+    if is_not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        # Keyed by the ETag, so a body is only ever cached and served under the version it was built from
+        response = jsonify(owner_cache.get_or_compute(user_id, 'revenue-data', lambda: monthly_revenue(user_id, months), etag))
+    
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@bp.route('/dashboard/stats')
+@read_only
+@login_required
+def dashboard_stats():
+    user_id = current_user.id
+    return jsonify(owner_cache.get_or_compute(user_id, 'stats', lambda: get_dashboard_stats(user_id)).to_dict())
+
+@bp.route('/reports/occupancy')
+@read_only
+@login_required
+def occupancy_data():
+    user_id = current_user.id
+    months = min(max(request.args.get('months', 12, type=int), 1), 120)
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        granularity = 'month'
+    report = owner_cache.get_or_compute(user_id, 'occupancy', lambda: trailing_occupancy(user_id, months, granularity), months, granularity)
+    return jsonify(report.to_dict())
+
+@bp.route('/reports/forecast')
+@read_only
+@login_required
+def forecast_data():
+    user_id = current_user.id
+    months = min(max(request.args.get('months', FORECAST_MONTHS, type=int), 1), 24)
+    result = owner_cache.get_or_compute(user_id, 'forecast', lambda: cash_flow_forecast(user_id, months),
+                                        months, date.today().strftime('%Y-%m'))
+    return jsonify(result.to_dict())
+
+# Typeahead for the room and tenant pickers
+@bp.route('/typeahead/rooms')
+@read_only
+@login_required
+def room_typeahead():
+    limit = min(max(request.args.get('limit', TYPEAHEAD_LIMIT, type=int), 1), 50)
+    choices = available_rooms(current_user.id, request.args.get('q', ''), limit)
+    return jsonify(results=[{'id': value, 'label': label} for value, label in choices])
+
+@bp.route('/typeahead/tenants')
+@read_only
+@login_required
+def tenant_typeahead():
+    limit = min(max(request.args.get('limit', TYPEAHEAD_LIMIT, type=int), 1), 50)
+    choices = active_tenants(current_user.id, request.args.get('q', ''), limit)
+    return jsonify(results=[{'id': value, 'label': label} for value, label in choices])
+
+@bp.route('/reports/aging')
+@read_only
+@login_required
+def aging_report():
+    aging = get_owner_aging(current_user.id)
+    return jsonify({
+        'pending': aging.pending,
+        'overdue': aging.overdue,
+        'buckets': aging.aging,
+    })
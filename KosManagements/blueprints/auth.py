@@ -0,0 +1,49 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, logout_user, login_required, current_user
+from app import db
+from models import User
+from forms import LoginForm, RegisterForm
+from identity import forget_identity
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/auth/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('reports.dashboard'))
+    
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        if user and user.check_password(form.password.data):
+            login_user(user, remember=form.remember_me.data)
+            flash('Login successful!', 'success')
+            next_page = request.args.get('next')
+            return redirect(next_page) if next_page else redirect(url_for('reports.dashboard'))
+        flash('Invalid email or password', 'danger')
+    
+    return render_template('auth/login.html', form=form)
+
+@bp.route('/auth/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('reports.dashboard'))
+    
+    form = RegisterForm()
+    if form.validate_on_submit():
+        user = User(username=form.username.data, email=form.email.data)
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Registration successful! Please log in.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('auth/register.html', form=form)
+
+@bp.route('/auth/logout')
+@login_required
+def logout():
+    forget_identity(current_user.id)
+    logout_user()
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('auth.login'))
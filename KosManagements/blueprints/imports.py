@@ -0,0 +1,26 @@
+from flask import Blueprint, render_template, request, flash, abort
+from flask_login import login_required, current_user
+from importer import import_csv, IMPORTERS, IMPORT_COLUMNS
+
+bp = Blueprint('imports', __name__)
+
+@bp.route('/import/<kind>', methods=['GET', 'POST'])
+@login_required
+def import_data(kind):
+    if kind not in IMPORTERS:
+        abort(404)
+    
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV file to import.', 'danger')
+        else:
+            result = import_csv(kind, upload.stream, current_user.id)
+            if result.error_count:
+                flash(f'Nothing imported: {result.error_count} row(s) rejected.', 'danger')
+            else:
+                flash(f'Imported {result.created} {kind}.', 'success')
+    
+    return render_template('imports/form.html', kind=kind, kinds=sorted(IMPORTERS),
+                         columns=IMPORT_COLUMNS[kind], result=result)
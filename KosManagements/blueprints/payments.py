@@ -0,0 +1,139 @@
+from datetime import date
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from routing import read_only
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app import db
+from models import Tenant, Payment
+from forms import PaymentForm
+from billing import generate_invoices, next_period, parse_period
+from reminders import enqueue_reminders
+from bulk import mark_payments_paid
+from lookups import active_tenants, find_tenant
+from exports import csv_response, payments_query, PAYMENT_COLUMNS
+from pagination import keyset_paginate, InvalidCursor
+
+bp = Blueprint('payments', __name__)
+
+@bp.route('/payments')
+@read_only
+@login_required
+def index():
+    cursor = request.args.get('cursor')
+    status_filter = request.args.get('status', '')
+    with_total = request.args.get('total', type=bool, default=False)
+    
+    query = select(Payment).where(Payment.user_id == current_user.id)
+    
+    if status_filter:
+        query = query.where(Payment.status == status_filter)
+    
+    try:
+        payments = keyset_paginate(query, Payment.due_date, Payment.id, cursor=cursor, per_page=15,
+                                   count_limit=1000 if with_total else None,
+                                   options=[joinedload(Payment.room), joinedload(Payment.tenant)])
+    except InvalidCursor:
+        abort(400)
+    
+    return render_template('payments/index.html', payments=payments, status_filter=status_filter)
+
+@bp.route('/payments/new', methods=['GET', 'POST'])
+@login_required
+def new():
+    form = PaymentForm()
+    form.tenant_id.lookup = lambda tenant_id: find_tenant(current_user.id, tenant_id)
+    
+    if form.validate_on_submit():
+        tenant = db.session.get(Tenant, form.tenant_id.data)
+        payment = Payment(
+            amount=form.amount.data,
+            due_date=form.due_date.data,
+            status=form.status.data,
+            notes=form.notes.data,
+            room_id=tenant.room_id,
+            tenant_id=tenant.id,
+            user_id=tenant.user_id
+        )
+        
+        if form.status.data == 'paid':
+            payment.paid_date = form.paid_date.data or date.today()
+        
+        db.session.add(payment)
+        db.session.commit()
+        flash('Payment record created successfully!', 'success')
+        return redirect(url_for('payments.index'))
+    
+    # The first active tenants; the typeahead fetches the others
+    form.tenant_id.choices = active_tenants(current_user.id, include=form.tenant_id.data)
+    return render_template('payments/form.html', form=form, title='Add Payment Record')
+
+@bp.route('/payments/<int:id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit(id):
+    payment = Payment.query.filter(Payment.user_id == current_user.id, Payment.id == id).first_or_404()
+    form = PaymentForm(obj=payment)
+    form.tenant_id.lookup = lambda tenant_id: find_tenant(current_user.id, tenant_id, allow=payment.tenant_id)
+    
+    if form.validate_on_submit():
+        old_status = payment.status
+        form.populate_obj(payment)
+        
+        # Handle status changes
+        if payment.status == 'paid' and old_status != 'paid':
+            payment.paid_date = form.paid_date.data or date.today()
+        elif payment.status != 'paid':
+            payment.paid_date = None
+        
+        db.session.commit()
+        flash('Payment updated successfully!', 'success')
+        return redirect(url_for('payments.index'))
+    
+    form.tenant_id.choices = active_tenants(current_user.id, include=form.tenant_id.data)
+    return render_template('payments/form.html', form=form, title='Edit Payment', payment=payment)
+
+@bp.route('/payments/<int:id>/mark_paid', methods=['POST'])
+@login_required
+def mark_paid(id):
+    payment = Payment.query.filter(Payment.user_id == current_user.id, Payment.id == id).first_or_404()
+    payment.status = 'paid'
+    payment.paid_date = date.today()
+    db.session.commit()
+    flash('Payment marked as paid!', 'success')
+    return redirect(url_for('payments.index'))
+
+@bp.route('/payments/mark_paid', methods=['POST'])
+@login_required
+def bulk_mark_paid():
+    updated = mark_payments_paid(current_user.id, request.form.getlist('ids', type=int))
+    flash(f'Marked {updated} payment(s) as paid.', 'success' if updated else 'info')
+    return redirect(url_for('payments.index', status=request.form.get('status') or None))
+
+@bp.route('/payments/generate', methods=['POST'])
+@login_required
+def generate():
+    try:
+        period = parse_period(request.form['period']) if request.form.get('period') else next_period()
+    except ValueError as exc:
+        flash(str(exc), 'danger')
+        return redirect(url_for('payments.index'))
+    
+    created = generate_invoices(period, current_user.id)
+    flash(f'Generated {created} invoice(s) for {period:%B %Y}.', 'success' if created else 'info')
+    return redirect(url_for('payments.index'))
+
+@bp.route('/payments/reminders', methods=['POST'])
+@login_required
+def reminders():
+    # Only queues the messages; the dispatcher sends them outside the request
+    queued = enqueue_reminders(user_id=current_user.id)
+    flash(f'Queued {queued} reminder(s) for upcoming and overdue payments.', 'success' if queued else 'info')
+    return redirect(url_for('payments.index'))
+
+@bp.route('/export/payments.csv')
+@read_only
+@login_required
+def export():
+    status_filter = request.args.get('status', '')
+    return csv_response('payments.csv', PAYMENT_COLUMNS, payments_query(current_user.id, status_filter),
+                        compress=request.args.get('gzip', type=bool, default=False))
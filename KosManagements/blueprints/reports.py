@@ -0,0 +1,99 @@
+from datetime import datetime, date, MAXYEAR
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from routing import read_only
+from app import db
+from models import Expense
+from forms import ExpenseForm
+from stats import get_dashboard_stats, get_recent_payments, get_popular_rooms
+from reports import monthly_report, report_totals, get_recent_expenses
+from occupancy import trailing_occupancy
+from forecast import cash_flow_forecast, FORECAST_MONTHS
+from cache import owner_cache
+from exports import csv_response, expenses_query, EXPENSE_COLUMNS
+
+bp = Blueprint('reports', __name__)
+
+@bp.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('reports.dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/dashboard')
+@read_only
+@login_required
+def dashboard():
+    user_id = current_user.id
+    stats, recent_payments, popular_rooms, occupancy = owner_cache.get_or_compute(user_id, 'dashboard', lambda: (
+        get_dashboard_stats(user_id),
+        get_recent_payments(user_id),
+        get_popular_rooms(user_id),
+        trailing_occupancy(user_id),
+    ))
+    
+    return render_template('dashboard.html',
+                         stats=stats,
+                         recent_payments=recent_payments,
+                         popular_rooms=popular_rooms,
+                         occupancy=occupancy)
+
+@bp.route('/reports/financial')
+@read_only
+@login_required
+def financial():
+    user_id = current_user.id
+    year = request.args.get('year', datetime.now().year, type=int)
+    if not 1 <= year < MAXYEAR:
+        abort(400)
+    monthly_data, recent_expenses, (total_revenue, total_expenses) = owner_cache.get_or_compute(
+        user_id, 'financial', lambda: (
+            monthly_report(user_id, date(year, 1, 1), date(year + 1, 1, 1)),
+            get_recent_expenses(user_id),
+            report_totals(user_id),
+        ), year)
+    
+    return render_template('reports/financial.html',
+                         monthly_data=monthly_data,
+                         recent_expenses=recent_expenses,
+                         total_revenue=total_revenue,
+                         total_expenses=total_expenses)
+
+@bp.route('/reports/forecast')
+@read_only
+@login_required
+def forecast():
+    user_id = current_user.id
+    months = min(max(request.args.get('months', FORECAST_MONTHS, type=int), 1), 24)
+    # Keyed by the current month too, so the forecast moves on when the month does
+    result = owner_cache.get_or_compute(user_id, 'forecast', lambda: cash_flow_forecast(user_id, months),
+                                        months, date.today().strftime('%Y-%m'))
+    return render_template('reports/forecast.html', forecast=result, months=months)
+
+@bp.route('/expenses/new', methods=['GET', 'POST'])
+@login_required
+def new_expense():
+    form = ExpenseForm()
+    if form.validate_on_submit():
+        expense = Expense(
+            description=form.description.data,
+            amount=form.amount.data,
+            category=form.category.data,
+            date=form.date.data,
+            notes=form.notes.data,
+            user_id=current_user.id
+        )
+        db.session.add(expense)
+        db.session.commit()
+        flash('Expense recorded successfully!', 'success')
+        return redirect(url_for('reports.financial'))
+    
+    return render_template('expenses/form.html', form=form, title='Add Expense')
+
+@bp.route('/export/expenses.csv')
+@read_only
+@login_required
+def export_expenses():
+    return csv_response('expenses.csv', EXPENSE_COLUMNS, expenses_query(current_user.id),
+                        compress=request.args.get('gzip', type=bool, default=False))
+
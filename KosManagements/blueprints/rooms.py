@@ -0,0 +1,88 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from routing import read_only
+from app import db
+from models import Room
+from forms import RoomForm
+from loaders import load_room_aggregates
+from bulk import change_rent
+
+bp = Blueprint('rooms', __name__)
+
+@bp.route('/rooms')
+@read_only
+@login_required
+def index():
+    page = request.args.get('page', 1, type=int)
+    status_filter = request.args.get('status', '')
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    
+    query = Room.query.filter_by(user_id=current_user.id)
+    
+    if status_filter:
+        query = query.filter(Room.status == status_filter)
+    if min_price:
+        query = query.filter(Room.monthly_rent >= min_price)
+    if max_price:
+        query = query.filter(Room.monthly_rent <= max_price)
+    
+    rooms = query.order_by(Room.number).paginate(page=page, per_page=10, error_out=False)
+    load_room_aggregates(rooms.items)
+    return render_template('rooms/index.html', rooms=rooms, 
+                         status_filter=status_filter, min_price=min_price, max_price=max_price)
+
+@bp.route('/rooms/new', methods=['GET', 'POST'])
+@login_required
+def new():
+    form = RoomForm()
+    if form.validate_on_submit():
+        room = Room(
+            number=form.number.data,
+            description=form.description.data,
+            monthly_rent=form.monthly_rent.data,
+            status=form.status.data,
+            user_id=current_user.id
+        )
+        db.session.add(room)
+        db.session.commit()
+        flash('Room created successfully!', 'success')
+        return redirect(url_for('rooms.index'))
+    
+    return render_template('rooms/form.html', form=form, title='Add New Room')
+
+@bp.route('/rooms/<int:id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit(id):
+    room = Room.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    form = RoomForm(obj=room)
+    
+    if form.validate_on_submit():
+        form.populate_obj(room)
+        db.session.commit()
+        flash('Room updated successfully!', 'success')
+        return redirect(url_for('rooms.index'))
+    
+    return render_template('rooms/form.html', form=form, title='Edit Room', room=room)
+
+@bp.route('/rooms/<int:id>/delete', methods=['POST'])
+@login_required
+def delete(id):
+    room = Room.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    db.session.delete(room)
+    db.session.commit()
+    flash('Room deleted successfully!', 'success')
+    return redirect(url_for('rooms.index'))
+
+@bp.route('/rooms/rent', methods=['POST'])
+@login_required
+def bulk_rent():
+    try:
+        updated = change_rent(current_user.id, request.form.getlist('ids', type=int),
+                              amount=request.form.get('monthly_rent', type=float),
+                              percent=request.form.get('percent', type=float))
+    except ValueError as exc:
+        flash(str(exc), 'danger')
+        return redirect(url_for('rooms.index'))
+    flash(f'Updated the rent of {updated} room(s).', 'success' if updated else 'info')
+    return redirect(url_for('rooms.index'))
@@ -0,0 +1,19 @@
+from flask import Blueprint, render_template, request
+from flask_login import login_required, current_user
+from routing import read_only
+from search import search, KINDS, KINDS_BY_NAME
+
+bp = Blueprint('search', __name__)
+
+@bp.route('/search')
+@read_only
+@login_required
+def index():
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind', '')
+    page = request.args.get('page', 1, type=int)
+    
+    kinds = [KINDS_BY_NAME[kind]] if kind in KINDS_BY_NAME else None
+    results = search(current_user.id, query, kinds, page=page)
+    return render_template('search/index.html', results=results, query=query, kind=kind if kinds else '',
+                           kinds=[k.name for k in KINDS])
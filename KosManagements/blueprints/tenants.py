@@ -0,0 +1,116 @@
+from datetime import date
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from routing import read_only
+from sqlalchemy.orm import joinedload
+from app import db
+from models import Room, Tenant
+from forms import TenantForm
+from balances import load_tenant_balances
+from bulk import deactivate_tenants
+from lookups import available_rooms, find_room
+from exports import csv_response, tenants_query, TENANT_COLUMNS
+
+bp = Blueprint('tenants', __name__)
+
+@bp.route('/tenants')
+@read_only
+@login_required
+def index():
+    page = request.args.get('page', 1, type=int)
+    active_only = request.args.get('active_only', type=bool, default=True)
+    
+    query = Tenant.query.filter(Tenant.user_id == current_user.id)
+    
+    if active_only:
+        query = query.filter(Tenant.is_active == True)
+    
+    tenants = query.options(joinedload(Tenant.room)).order_by(Tenant.name).paginate(page=page, per_page=10, error_out=False)
+    load_tenant_balances(tenants.items)
+    return render_template('tenants/index.html', tenants=tenants, active_only=active_only)
+
+@bp.route('/tenants/new', methods=['GET', 'POST'])
+@login_required
+def new():
+    form = TenantForm()
+    form.room_id.lookup = lambda room_id: find_room(current_user.id, room_id)
+    
+    if form.validate_on_submit():
+        tenant = Tenant(
+            name=form.name.data,
+            phone=form.phone.data,
+            email=form.email.data,
+            start_date=form.start_date.data,
+            room_id=form.room_id.data,
+            user_id=current_user.id
+        )
+        
+        # Update room status to occupied
+        room = db.session.get(Room, form.room_id.data)
+        room.status = 'occupied'
+        
+        db.session.add(tenant)
+        db.session.commit()
+        flash('Tenant added successfully!', 'success')
+        return redirect(url_for('tenants.index'))
+    
+    # The first available rooms; the typeahead fetches the others
+    form.room_id.choices = available_rooms(current_user.id, include=form.room_id.data)
+    return render_template('tenants/form.html', form=form, title='Add New Tenant')
+
+@bp.route('/tenants/<int:id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit(id):
+    tenant = Tenant.query.filter(Tenant.user_id == current_user.id, Tenant.id == id).first_or_404()
+    form = TenantForm(obj=tenant)
+    form.room_id.lookup = lambda room_id: find_room(current_user.id, room_id, allow=tenant.room_id)
+    
+    if form.validate_on_submit():
+        old_room_id = tenant.room_id
+        form.populate_obj(tenant)
+        
+        # Update room statuses if room changed
+        if old_room_id != tenant.room_id:
+            old_room = db.session.get(Room, old_room_id)
+            if old_room:
+                old_room.status = 'available'
+            
+            new_room = Room.query.filter_by(id=tenant.room_id, user_id=current_user.id).first_or_404()
+            new_room.status = 'occupied'
+            tenant.user_id = new_room.user_id
+        
+        db.session.commit()
+        flash('Tenant updated successfully!', 'success')
+        return redirect(url_for('tenants.index'))
+    
+    form.room_id.choices = available_rooms(current_user.id, include=form.room_id.data)
+    return render_template('tenants/form.html', form=form, title='Edit Tenant', tenant=tenant)
+
+@bp.route('/tenants/<int:id>/deactivate', methods=['POST'])
+@login_required
+def deactivate(id):
+    tenant = Tenant.query.filter(Tenant.user_id == current_user.id, Tenant.id == id).first_or_404()
+    tenant.is_active = False
+    tenant.end_date = date.today()
+    
+    # Update room status to available
+    tenant.room.status = 'available'
+    
+    db.session.commit()
+    flash('Tenant deactivated successfully!', 'success')
+    return redirect(url_for('tenants.index'))
+
+@bp.route('/tenants/deactivate', methods=['POST'])
+@login_required
+def bulk_deactivate():
+    updated = deactivate_tenants(current_user.id, request.form.getlist('ids', type=int))
+    flash(f'Deactivated {updated} tenant(s).', 'success' if updated else 'info')
+    return redirect(url_for('tenants.index'))
+
+@bp.route('/export/tenants.csv')
+@read_only
+@login_required
+def export():
+    active_only = request.args.get('active_only', type=bool, default=False)
+    return csv_response('tenants.csv', TENANT_COLUMNS, tenants_query(current_user.id, active_only),
+                        compress=request.args.get('gzip', type=bool, default=False))
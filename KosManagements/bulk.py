@@ -0,0 +1,74 @@
+from datetime import date
+
+from sqlalchemy import select, update, exists, func
+from app import db
+from models import Room, Tenant, Payment
+from reports import month_start, refresh_rollups, rollups_ready
+from versions import bump_versions
+from cache import owner_cache
+
+# Each operation is one set-based UPDATE scoped to the owner. Core statements
+# bypass the session events, so the rollups, data version and owner cache are
+# brought up to date here instead.
+
+def _commit(user_id, rollup_months=()):
+    connection = db.session.connection()
+    if rollup_months and rollups_ready():
+        refresh_rollups(connection, {(user_id, month) for month in rollup_months})
+    bump_versions(connection, [user_id])
+    db.session.commit()
+    owner_cache.bump(user_id)
+
+def mark_payments_paid(user_id, payment_ids, today=None):
+    """Mark the owner's unpaid payments among `payment_ids` paid today; returns how many changed"""
+    today = today or date.today()
+    result = db.session.execute(
+        update(Payment)
+        .where(Payment.user_id == user_id, Payment.id.in_(payment_ids), Payment.status != 'paid')
+        .values(status='paid', paid_date=today)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        _commit(user_id, [month_start(today)])
+    return result.rowcount
+
+def deactivate_tenants(user_id, tenant_ids, today=None):
+    """End the owner's active tenancies among `tenant_ids` and free rooms left without a tenant"""
+    result = db.session.execute(
+        update(Tenant)
+        .where(Tenant.user_id == user_id, Tenant.id.in_(tenant_ids), Tenant.is_active == True)
+        .values(is_active=False, end_date=today or date.today())
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return 0
+    occupied = select(Tenant.id).where(Tenant.room_id == Room.id, Tenant.is_active == True)
+    db.session.execute(
+        update(Room)
+        .where(Room.user_id == user_id,
+               Room.id.in_(select(Tenant.room_id).where(Tenant.id.in_(tenant_ids))),
+               ~exists(occupied))
+        .values(status='available')
+        .execution_options(synchronize_session=False)
+    )
+    _commit(user_id)
+    return result.rowcount
+
+def change_rent(user_id, room_ids, amount=None, percent=None):
+    """Set the rent of the owner's rooms to `amount`, or adjust it by `percent`"""
+    if (amount is None) == (percent is None):
+        raise ValueError('Give either a new rent or a percentage change')
+    if amount is not None and amount <= 0:
+        raise ValueError('Rent must be positive')
+    if percent is not None and percent <= -100:
+        raise ValueError('A rent cannot drop by 100% or more')
+    rent = amount if amount is not None else func.round(Room.monthly_rent * (1 + percent / 100), 2)
+    result = db.session.execute(
+        update(Room)
+        .where(Room.user_id == user_id, Room.id.in_(room_ids))
+        .values(monthly_rent=rent)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        _commit(user_id)
+    return result.rowcount
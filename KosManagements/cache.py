@@ -0,0 +1,177 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Room, Tenant, Payment, Expense
+from metrics import CACHE_REQUESTS
+
+MISSING = object()
+OWNED_MODELS = (Room, Tenant, Payment, Expense)
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class MemoryClient:
+    """Dict-backed stand-in for the subset of the redis client API used here"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+                return None
+            return entry[1]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, value)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data.get(key, (None, 0))[1]) + 1
+            self._data[key] = (None, value)
+            return value
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+def make_client(url):
+    """Build a shared cache client from CACHE_URL, or None for local-only caching"""
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return MemoryClient()
+    import redis  # optional dependency, only needed for a real shared backend
+    return redis.Redis.from_url(url)
+
+class OwnerCache:
+    """Read-through cache keyed by owner and invalidated by a per-owner version.
+
+    Every cached value's key embeds the owner's current version, so bumping
+    the version on writes makes stale entries unreachable; they age out of
+    the LRU instead of being deleted. With a shared client the versions and
+    values live there, so all worker processes see each other's bumps;
+    without one the key also carries the owner's durable data version, so
+    a write handled by another worker still invalidates this one's entries.
+    """
+
+    def __init__(self, local, client=None, prefix='kos'):
+        self.local = local
+        self.client = client
+        self.prefix = prefix
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _version_key(self, user_id):
+        return f'{self.prefix}:version:{user_id}'
+
+    def version(self, user_id):
+        if self.client is not None:
+            owner = self.client.get(self._version_key(user_id))
+            epoch = self.client.get(self._version_key('*'))
+            return f'{int(epoch or 0)}.{int(owner or 0)}'
+        with self._lock:
+            local = f'{self._versions.get("*", 0)}.{self._versions.get(user_id, 0)}'
+        # Other worker processes' bumps never reach this one, but their writes do move the durable version
+        from versions import data_version
+        return f'{local}.{data_version(user_id)[0]}'
+
+    def bump(self, *user_ids):
+        for user_id in user_ids:
+            if self.client is not None:
+                self.client.incr(self._version_key(user_id))
+            else:
+                with self._lock:
+                    self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def bump_all(self):
+        """Invalidate every owner, e.g. after a bulk UPDATE outside the ORM"""
+        self.bump('*')
+
+    def init_app(self, app):
+        self.local = LocalCache(maxsize=app.config['CACHE_MAX_ENTRIES'], ttl=app.config['CACHE_TTL'])
+        self.client = make_client(app.config['CACHE_URL'])
+
+    def get_or_compute(self, user_id, name, compute, *args):
+        key = f'{self.prefix}:{name}:{user_id}:{self.version(user_id)}:{":".join(map(str, args))}'
+        value = self.local.get(key)
+        if value is not MISSING:
+            CACHE_REQUESTS.inc(name=name, result='hit')
+            return value
+        if self.client is not None:
+            raw = self.client.get(key)
+            if raw is not None:
+                CACHE_REQUESTS.inc(name=name, result='shared_hit')
+                value = pickle.loads(raw)
+                self.local.set(key, value)
+                return value
+
+        CACHE_REQUESTS.inc(name=name, result='miss')
+        value = compute()
+        self.local.set(key, value)
+        if self.client is not None:
+            self.client.set(key, pickle.dumps(value), ex=self.local.ttl)
+        return value
+
+owner_cache = OwnerCache(LocalCache())
+
+def owners_of(obj):
+    history = inspect(obj).attrs['user_id'].history
+    return {v for v in (*history.added, *history.unchanged, *history.deleted) if v is not None}
+
+@event.listens_for(Session, 'before_flush')
+def _collect_dirty_owners(session, flush_context, instances):
+    owners = session.info.setdefault('cache_owners', set())
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, OWNED_MODELS):
+            owners |= owners_of(obj)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_owner_versions(session):
+    owners = session.info.pop('cache_owners', None)
+    if owners:
+        owner_cache.bump(*owners)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_owner_versions(session):
+    session.info.pop('cache_owners', None)
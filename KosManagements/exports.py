@@ -0,0 +1,84 @@
+import csv
+import io
+import zlib
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+from app import db
+from models import Room, Tenant, Payment, Expense
+
+BATCH_SIZE = 1000
+
+PAYMENT_COLUMNS = ['id', 'due_date', 'paid_date', 'status', 'amount', 'tenant', 'room', 'billing_period', 'notes']
+EXPENSE_COLUMNS = ['id', 'date', 'category', 'description', 'amount', 'notes']
+TENANT_COLUMNS = ['id', 'name', 'phone', 'email', 'room', 'start_date', 'end_date', 'is_active']
+
+def payments_query(user_id, status_filter=''):
+    """Payment export rows, filtered like the payments list"""
+    stmt = (
+        select(Payment.id, Payment.due_date, Payment.paid_date, Payment.status, Payment.amount,
+               Tenant.name, Room.number, Payment.billing_period, Payment.notes)
+        .join(Tenant, Payment.tenant_id == Tenant.id)
+        .join(Room, Payment.room_id == Room.id)
+        .where(Payment.user_id == user_id)
+        .order_by(Payment.due_date.desc(), Payment.id.desc())
+    )
+    if status_filter:
+        stmt = stmt.where(Payment.status == status_filter)
+    return stmt
+
+def expenses_query(user_id):
+    return (
+        select(Expense.id, Expense.date, Expense.category, Expense.description, Expense.amount, Expense.notes)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date.desc(), Expense.id.desc())
+    )
+
+def tenants_query(user_id, active_only=False):
+    stmt = (
+        select(Tenant.id, Tenant.name, Tenant.phone, Tenant.email, Room.number,
+               Tenant.start_date, Tenant.end_date, Tenant.is_active)
+        .join(Room, Tenant.room_id == Room.id)
+        .where(Tenant.user_id == user_id)
+        .order_by(Tenant.name, Tenant.id)
+    )
+    if active_only:
+        stmt = stmt.where(Tenant.is_active == True)
+    return stmt
+
+def iter_csv(header, stmt):
+    """Yield CSV text a batch at a time while the rows are still being fetched.
+
+    stream_results asks the driver for a server-side cursor where it has
+    one (psycopg2), so neither the database client nor this process ever
+    holds more than one batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+    for batch in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def csv_response(filename, header, stmt, compress=False):
+    chunks = iter_csv(header, stmt)
+    if compress:
+        return Response(stream_with_context(gzip_stream(chunks)), mimetype='application/gzip', headers={
+            'Content-Disposition': f'attachment; filename="{filename}.gz"',
+        })
+    return Response(stream_with_context(chunks), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+    })
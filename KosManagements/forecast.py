@@ -0,0 +1,237 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import select, func, extract, case, and_, or_
+from app import db
+from models import Room, Tenant, Payment, Expense
+from reports import month_start, add_months
+from billing import prorated_amount
+
+FORECAST_MONTHS = 6
+HISTORY_MONTHS = 12  # complete months the collection and expense rates are learned from
+MAX_LAG = 3  # payments this many months late or later share one bucket
+
+@dataclass(frozen=True)
+class ForecastMonth:
+    month: date
+    billed: float  # rent and open invoices falling due this month
+    income: float  # cash expected in, including late payments of earlier months
+    expenses: float
+    expenses_by_category: dict
+
+    @property
+    def net(self):
+        return self.income - self.expenses
+
+    def to_dict(self):
+        return {
+            'month': self.month.isoformat(),
+            'billed': self.billed,
+            'income': self.income,
+            'expenses': self.expenses,
+            'expenses_by_category': self.expenses_by_category,
+            'net': round(self.net, 2),
+        }
+
+@dataclass(frozen=True)
+class CashFlowForecast:
+    start: date
+    months: tuple
+    collection: tuple  # share of billed rent paid 0, 1, .. MAX_LAG+ months after its due month
+    arrears: float  # unpaid before the forecast starts
+
+    @property
+    def income(self):
+        return sum(month.income for month in self.months)
+
+    @property
+    def expenses(self):
+        return sum(month.expenses for month in self.months)
+
+    @property
+    def net(self):
+        return self.income - self.expenses
+
+    def to_dict(self):
+        return {
+            'start': self.start.isoformat(),
+            'collection': list(self.collection),
+            'arrears': self.arrears,
+            'income': round(self.income, 2),
+            'expenses': round(self.expenses, 2),
+            'net': round(self.net, 2),
+            'months': [month.to_dict() for month in self.months],
+        }
+
+def _index(value):
+    return value.year * 12 + value.month - 1
+
+def _is_month_end(value):
+    return (value + timedelta(days=1)).day == 1
+
+def _by_month(column):
+    return extract('year', column), extract('month', column)
+
+def _covers(period, period_end):
+    """The tenant occupies the whole month"""
+    return and_(Tenant.start_date <= period, or_(Tenant.end_date == None, Tenant.end_date >= period_end))
+
+def _rent_roll(user_id, first, count):
+    """Rent due per forecast month from active tenants not yet invoiced for it.
+
+    Whole months are summed in SQL, one aggregate over all the owner's
+    tenants and one over their invoices; only tenants moving in or out
+    during the horizon come back as rows, to prorate those months.
+    """
+    end = add_months(first, count)
+    months = [add_months(first, offset) for offset in range(count)]
+    month_ends = {month: add_months(month, 1) - timedelta(days=1) for month in months}
+    base = _index(first)
+    active = and_(Tenant.user_id == user_id, Tenant.is_active == True, Tenant.start_date < end,
+                  or_(Tenant.end_date == None, Tenant.end_date >= first))
+
+    rent = [float(amount) for amount in db.session.execute(
+        select(*(func.coalesce(func.sum(case((_covers(month, month_ends[month]), Room.monthly_rent), else_=0)), 0)
+                 for month in months))
+        .select_from(Tenant).join(Room, Tenant.room_id == Room.id).where(active)
+    ).one()]
+    movers = db.session.execute(
+        select(Tenant.start_date, Tenant.end_date, Room.monthly_rent)
+        .join(Room, Tenant.room_id == Room.id)
+        .where(active, or_(Tenant.start_date >= first, Tenant.end_date < end))
+    )
+    for start_date, end_date, monthly_rent in movers:
+        edges = set()
+        if start_date.day > 1:
+            edges.add(month_start(start_date))
+        if end_date is not None and not _is_month_end(end_date):
+            edges.add(month_start(end_date))
+        for edge in edges:
+            if first <= edge < end:
+                rent[_index(edge) - base] += prorated_amount(monthly_rent, start_date, end_date, edge)
+
+    # Invoices already generated for a forecast month replace the tenant's rent roll entry
+    invoiced = (
+        select(Payment.billing_period)
+        .join(Tenant, Payment.tenant_id == Tenant.id).join(Room, Tenant.room_id == Room.id)
+        .where(active, Payment.user_id == user_id, Payment.billing_period >= first, Payment.billing_period < end)
+    )
+    covered = _covers(Payment.billing_period, case(month_ends, value=Payment.billing_period))
+    for period, amount in db.session.execute(
+        invoiced.add_columns(func.sum(Room.monthly_rent)).where(covered).group_by(Payment.billing_period)
+    ):
+        rent[_index(period) - base] -= amount
+    for period, start_date, end_date, monthly_rent in db.session.execute(
+        invoiced.add_columns(Tenant.start_date, Tenant.end_date, Room.monthly_rent).where(~covered)
+    ):
+        rent[_index(period) - base] -= prorated_amount(monthly_rent, start_date, end_date, period)
+    return rent
+
+def _collection_shares(user_id, first):
+    """Share of the amount due in each of the last HISTORY_MONTHS paid 0..MAX_LAG months late.
+
+    The shares sum to at most 1; the rest was never paid.
+    """
+    current = add_months(first, -1)
+    due_year, due_month = _by_month(Payment.due_date)
+    paid_year, paid_month = _by_month(Payment.paid_date)
+    rows = db.session.execute(
+        select(Payment.status, due_year, due_month, paid_year, paid_month, func.sum(Payment.amount))
+        .where(Payment.user_id == user_id,
+               Payment.due_date >= add_months(current, -HISTORY_MONTHS), Payment.due_date < current)
+        .group_by(Payment.status, due_year, due_month, paid_year, paid_month)
+    ).all()
+    shares, total = [0.0] * (MAX_LAG + 1), 0.0
+    for status, due_y, due_m, paid_y, paid_m, amount in rows:
+        total += amount
+        if status == 'paid' and paid_y is not None:
+            lag = (int(paid_y) - int(due_y)) * 12 + int(paid_m) - int(due_m)
+            shares[min(max(lag, 0), MAX_LAG)] += amount
+    if not total:
+        return (1.0,) + (0.0,) * MAX_LAG
+    return tuple(share / total for share in shares)
+
+def _unpaid_by_month(user_id, first, count):
+    """Open invoices per due month, with everything MAX_LAG or more months overdue in the first slot.
+
+    Slot j holds the month MAX_LAG - j months before `first`, so the
+    forecast months are slots MAX_LAG .. MAX_LAG + count - 1.
+    """
+    due_year, due_month = _by_month(Payment.due_date)
+    rows = db.session.execute(
+        select(due_year, due_month, func.sum(Payment.amount))
+        .where(Payment.user_id == user_id, Payment.status.in_(('pending', 'overdue')),
+               Payment.due_date < add_months(first, count))
+        .group_by(due_year, due_month)
+    ).all()
+    unpaid = [0.0] * (MAX_LAG + count)
+    origin = _index(first) - MAX_LAG
+    for year, month, amount in rows:
+        unpaid[max(int(year) * 12 + int(month) - 1 - origin, 0)] += amount
+    return unpaid
+
+def _expense_trend(user_id, first, count):
+    """{category: [amount per forecast month]} from a least-squares line through each category's history"""
+    current = add_months(first, -1)
+    history_start = add_months(current, -HISTORY_MONTHS)
+    year, month = _by_month(Expense.date)
+    series = defaultdict(lambda: [0.0] * HISTORY_MONTHS)
+    for category, y, m, amount in db.session.execute(
+        select(Expense.category, year, month, func.sum(Expense.amount))
+        .where(Expense.user_id == user_id, Expense.date >= history_start, Expense.date < current)
+        .group_by(Expense.category, year, month)
+    ):
+        series[category][int(y) * 12 + int(m) - 1 - _index(history_start)] += amount
+
+    mean_x = (HISTORY_MONTHS - 1) / 2
+    spread = sum((x - mean_x) ** 2 for x in range(HISTORY_MONTHS))
+    trend = {}
+    for category, values in series.items():
+        mean_y = sum(values) / HISTORY_MONTHS
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values)) / spread
+        # The current month sits at x = HISTORY_MONTHS, so forecasts start one further on
+        trend[category] = [
+            round(max(mean_y + slope * (HISTORY_MONTHS + 1 + offset - mean_x), 0.0), 2)
+            for offset in range(count)
+        ]
+    return trend
+
+def cash_flow_forecast(user_id, months=FORECAST_MONTHS, today=None):
+    """Expected income and expenses for each of the next `months` months.
+
+    Income comes from the rent roll of active tenants plus open invoices,
+    spread over the months they are likely to be paid in by the owner's
+    own history of late payments. Arrears are collected the same way,
+    conditioned on having stayed unpaid so far. Expenses follow each
+    category's trend over the last HISTORY_MONTHS months.
+    """
+    first = add_months(month_start(today or date.today()), 1)
+    shares = _collection_shares(user_id, first)
+    unpaid = _unpaid_by_month(user_id, first, months)
+    arrears = sum(unpaid[:MAX_LAG])
+    rent = _rent_roll(user_id, first, months)
+    billed = unpaid[:MAX_LAG] + [unpaid[MAX_LAG + i] + rent[i] for i in range(months)]
+
+    # Amounts already some months overdue can only be paid at the lags still ahead of them
+    for slot in range(MAX_LAG):
+        remaining = 1.0 - sum(shares[:MAX_LAG - slot])
+        billed[slot] = billed[slot] / remaining if remaining > 1e-9 else 0.0
+    income = [
+        sum(billed[slot] * shares[offset + MAX_LAG - slot]
+            for slot in range(max(offset, 0), offset + MAX_LAG + 1))
+        for offset in range(months)
+    ]
+
+    trend = _expense_trend(user_id, first, months)
+    periods = []
+    for offset in range(months):
+        by_category = {category: values[offset] for category, values in sorted(trend.items()) if values[offset]}
+        periods.append(ForecastMonth(
+            add_months(first, offset),
+            round(unpaid[MAX_LAG + offset] + rent[offset], 2),
+            round(income[offset], 2),
+            round(sum(by_category.values()), 2),
+            by_category,
+        ))
+    return CashFlowForecast(first, tuple(periods), tuple(round(share, 4) for share in shares), round(arrears, 2))
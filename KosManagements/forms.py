@@ -5,6 +5,28 @@ from wtforms.widgets import TextArea
 from models import User, Room
 from datetime import date
 
+class LookupSelectField(SelectField):
+    """A select whose options come from a typeahead endpoint.
+
+    The view sets `lookup(id)`, returning the option's label or None. The
+    submitted id is checked with that one query instead of a search
+    through a full choice list. The page only renders the options it needs.
+    """
+    
+    def __init__(self, label=None, validators=None, **kwargs):
+        kwargs.setdefault('coerce', int)
+        super().__init__(label, validators, **kwargs)
+        self.lookup = None
+    
+    def pre_validate(self, form):
+        if not self.validate_choice:
+            return
+        label = self.lookup(self.data) if self.data is not None and self.lookup else None
+        if label is None:
+            raise ValidationError(self.gettext('Not a valid choice.'))
+        if not any(value == self.data for value, _ in self.choices or ()):
+            self.choices = [(self.data, label)] + list(self.choices or ())
+
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     password = PasswordField('Password', validators=[DataRequired()])
@@ -39,10 +61,10 @@ class TenantForm(FlaskForm):
     phone = StringField('Phone Number', validators=[Optional(), Length(max=20)])
     email = StringField('Email', validators=[Optional(), Email(), Length(max=120)])
     start_date = DateField('Start Date', validators=[DataRequired()], default=date.today)
-    room_id = SelectField('Room', coerce=int, validators=[DataRequired()])
+    room_id = LookupSelectField('Room', validators=[DataRequired()])
 
 class PaymentForm(FlaskForm):
-    tenant_id = SelectField('Tenant', coerce=int, validators=[DataRequired()])
+    tenant_id = LookupSelectField('Tenant', validators=[DataRequired()])
     amount = FloatField('Amount ($)', validators=[DataRequired(), NumberRange(min=0)])
     due_date = DateField('Due Date', validators=[DataRequired()])
     paid_date = DateField('Paid Date', validators=[Optional()])
@@ -0,0 +1,19 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master and workers fork from it, so they
+start without re-importing anything and share its memory pages.
+"""
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+preload_app = True
+
+def post_fork(server, worker):
+    from app import db, start_background_jobs
+    app = server.app.wsgi()
+    with app.app_context():
+        # Never share pooled connections the master may have opened with the children
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    start_background_jobs(app)
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+from flask_login import UserMixin
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from app import db
+from models import User
+from cache import LocalCache, MISSING
+
+@dataclass(frozen=True, eq=False)
+class Identity(UserMixin):
+    """The logged-in user as current_user sees it: plain values, no ORM state.
+
+    Being detached from any session, it can be shared across requests and
+    threads; load the User row explicitly for anything else.
+    """
+    id: int
+    username: str
+    email: str
+
+identities = LocalCache(maxsize=4096, ttl=60)
+
+def load_identity(user_id):
+    """Serve the session's user from the cache, with one column SELECT on a miss"""
+    identity = identities.get(user_id)
+    if identity is not MISSING:
+        return identity
+    row = db.session.execute(select(User.id, User.username, User.email).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    identity = Identity(row.id, row.username, row.email)
+    identities.set(user_id, identity)
+    return identity
+
+def forget_identity(*user_ids):
+    for user_id in user_ids:
+        identities.delete(user_id)
+
+def init_app(app):
+    identities.maxsize = app.config['USER_CACHE_MAX_ENTRIES']
+    identities.ttl = app.config['USER_CACHE_TTL']
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_users', set())
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _forget_changed_users(session):
+    forget_identity(*session.info.pop('changed_users', ()))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_users', None)
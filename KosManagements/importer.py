@@ -0,0 +1,276 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+import click
+from sqlalchemy import select, insert, update, exists
+from werkzeug.datastructures import MultiDict
+from flask.cli import with_appcontext
+from app import db
+from models import Room, Tenant, Payment, User
+from forms import RoomForm, TenantForm, PaymentForm
+from reports import rebuild_rollups, rollups_ready
+from cache import owner_cache
+from versions import bump_versions
+from metrics import track_job
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_COLUMNS = {
+    'rooms': ['number', 'description', 'monthly_rent', 'status'],
+    'tenants': ['name', 'phone', 'email', 'start_date', 'room_number'],
+    'payments': ['room_number', 'tenant_name', 'amount', 'due_date', 'paid_date', 'status', 'notes'],
+}
+REQUIRED_COLUMNS = {
+    'rooms': {'number', 'monthly_rent', 'status'},
+    'tenants': {'name', 'room_number'},
+    'payments': {'room_number', 'amount', 'due_date', 'status'},
+}
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)  # (line number, message), capped
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+def _form_errors(form):
+    return '; '.join(f'{name}: {", ".join(errors)}' for name, errors in form.errors.items())
+
+class FormValidator:
+    """Check rows with the same WTForms class the HTML forms use.
+
+    One form is bound up front and re-processed per row, which is several
+    times cheaper than constructing a form for every line. Select fields in
+    `resolved` receive ids already looked up in the importer's maps, so
+    WTForms' linear scan over choices is skipped.
+    """
+
+    def __init__(self, form_cls, resolved=()):
+        self.form = form_cls(formdata=None, meta={'csrf': False})
+        self.resolved = resolved
+        for name in resolved:
+            self.form[name].validate_choice = False
+
+    def validate(self, row, **ids):
+        formdata = MultiDict({k: v for k, v in row.items() if v not in (None, '')})
+        for name, value in ids.items():
+            formdata[name] = str(value)
+        for form_field in self.form:
+            form_field.process(formdata)
+        return self.form.validate()
+
+class RowImporter(ABC):
+    kind = None
+
+    form_cls = None
+    resolved = ()
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.validator = FormValidator(self.form_cls, self.resolved)
+
+    def prepare(self):
+        """Load lookup maps once before the first batch"""
+
+    @abstractmethod
+    def convert(self, row):
+        """Return (values for INSERT, None) or (None, error message)"""
+
+    def after_batch(self, rows):
+        pass
+
+    def finish(self):
+        pass
+
+class RoomImporter(RowImporter):
+    kind = 'rooms'
+    form_cls = RoomForm
+
+    def prepare(self):
+        self.numbers = set(db.session.scalars(select(Room.number).where(Room.user_id == self.user_id)))
+
+    def convert(self, row):
+        form = self.validator.form
+        if not self.validator.validate(row):
+            return None, _form_errors(form)
+        if form.number.data in self.numbers:
+            return None, f'Room {form.number.data} already exists'
+        self.numbers.add(form.number.data)
+        return {
+            'number': form.number.data,
+            'description': form.description.data,
+            'monthly_rent': form.monthly_rent.data,
+            'status': form.status.data,
+            'user_id': self.user_id,
+        }, None
+
+class TenantImporter(RowImporter):
+    kind = 'tenants'
+    form_cls = TenantForm
+    resolved = ('room_id',)
+
+    def prepare(self):
+        has_tenant = exists().where(Tenant.room_id == Room.id, Tenant.is_active == True)
+        rows = db.session.execute(
+            select(Room.number, Room.id, (Room.status != 'available') | has_tenant).where(Room.user_id == self.user_id)
+        ).all()
+        self.rooms = {number: room_id for number, room_id, _ in rows}
+        # The form only offers available rooms; the choice check is skipped here, so enforce it directly
+        self.taken = {room_id for _, room_id, taken in rows if taken}
+        self.occupied = set()
+
+    def convert(self, row):
+        number = (row.get('room_number') or '').strip()
+        room_id = self.rooms.get(number)
+        if room_id is None:
+            return None, f'Unknown room {row.get("room_number")!r}'
+        if room_id in self.taken:
+            return None, f'Room {number} is already occupied'
+        form = self.validator.form
+        if not self.validator.validate(row, room_id=room_id):
+            return None, _form_errors(form)
+        self.taken.add(room_id)
+        return {
+            'name': form.name.data,
+            'phone': form.phone.data,
+            'email': form.email.data,
+            'start_date': form.start_date.data,
+            'room_id': room_id,
+            'user_id': self.user_id,
+        }, None
+
+    def after_batch(self, rows):
+        room_ids = {row['room_id'] for row in rows} - self.occupied
+        if room_ids:
+            db.session.execute(update(Room).where(Room.id.in_(room_ids)).values(status='occupied'))
+            self.occupied |= room_ids
+
+class PaymentImporter(RowImporter):
+    kind = 'payments'
+    form_cls = PaymentForm
+    resolved = ('tenant_id',)
+
+    def prepare(self):
+        self.rooms = dict(db.session.execute(select(Room.number, Room.id).where(Room.user_id == self.user_id)).all())
+        self.tenants_by_name = {}
+        self.active_tenant = {}
+        for tenant_id, room_id, name, is_active in db.session.execute(
+            select(Tenant.id, Tenant.room_id, Tenant.name, Tenant.is_active).where(Tenant.user_id == self.user_id)
+        ):
+            self.tenants_by_name.setdefault((room_id, name.strip().lower()), tenant_id)
+            if is_active:
+                self.active_tenant.setdefault(room_id, tenant_id)
+
+    def convert(self, row):
+        room_id = self.rooms.get((row.get('room_number') or '').strip())
+        if room_id is None:
+            return None, f'Unknown room {row.get("room_number")!r}'
+        tenant_name = (row.get('tenant_name') or '').strip().lower()
+        tenant_id = self.tenants_by_name.get((room_id, tenant_name)) if tenant_name else self.active_tenant.get(room_id)
+        if tenant_id is None:
+            return None, f'No tenant {row.get("tenant_name") or "(active)"} in room {row.get("room_number")}'
+        form = self.validator.form
+        if not self.validator.validate(row, tenant_id=tenant_id):
+            return None, _form_errors(form)
+        paid = form.status.data == 'paid'
+        return {
+            'amount': form.amount.data,
+            'due_date': form.due_date.data,
+            'paid_date': (form.paid_date.data or form.due_date.data) if paid else None,
+            'status': form.status.data,
+            'notes': form.notes.data,
+            'room_id': room_id,
+            'tenant_id': tenant_id,
+            'user_id': self.user_id,
+        }, None
+
+    def finish(self):
+        # Bulk inserts skip the flush hooks that keep monthly rollups current
+        if rollups_ready():
+            rebuild_rollups(db.session.connection(), self.user_id)
+
+IMPORTERS = {cls.kind: cls for cls in (RoomImporter, TenantImporter, PaymentImporter)}
+MODELS = {'rooms': Room, 'tenants': Tenant, 'payments': Payment}
+
+@track_job('import_csv')
+def import_csv(kind, stream, user_id, batch_size=BATCH_SIZE):
+    """Validate and bulk-insert CSV rows in one transaction.
+
+    stream is a binary file object; rows are read lazily and inserted in
+    batches so the upload is never held in memory. Invalid rows are
+    reported by line, and if there are any the whole file is rolled back:
+    an import either saves every row or none.
+    """
+    importer = IMPORTERS[kind](user_id)
+    model = MODELS[kind]
+    result = ImportResult()
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    missing = REQUIRED_COLUMNS[kind] - set(reader.fieldnames or ())
+    if missing:
+        result.add_error(1, f'Missing column(s): {", ".join(sorted(missing))}')
+        return result
+
+    importer.prepare()
+    batch = []
+    inserted = 0
+
+    def flush():
+        nonlocal inserted
+        if not batch or result.error_count:
+            batch.clear()  # the file is rolled back anyway; keep checking the rest of it
+            return
+        # Core insert on the table gives a true executemany; the ORM bulk path
+        # splits batches into one statement per run of rows with equal NULL columns
+        db.session.execute(insert(model.__table__), batch)
+        importer.after_batch(batch)
+        inserted += len(batch)
+        batch.clear()
+
+    try:
+        for row in reader:
+            values, error = importer.convert(row)
+            if error:
+                result.add_error(reader.line_num, error)
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        if result.error_count:
+            db.session.rollback()
+            return result
+        importer.finish()
+        bump_versions(db.session.connection(), [user_id])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    result.created = inserted
+    owner_cache.bump(user_id)
+    return result
+
+@click.command('import-csv')
+@with_appcontext
+@click.argument('kind', type=click.Choice(sorted(IMPORTERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', type=int, required=True, help='Owner to import into.')
+def import_csv_command(kind, path, user_id):
+    """Import rooms, tenants or payments from a CSV file."""
+    if db.session.get(User, user_id) is None:
+        raise click.BadParameter(f'No user with id {user_id}', param_hint='--user-id')
+    with open(path, 'rb') as stream:
+        result = import_csv(kind, stream, user_id)
+    if not result.error_count:
+        click.echo(f'Imported {result.created} {kind}')
+        return
+    click.echo(f'Nothing imported: {result.error_count} row(s) rejected')
+    for line, message in result.errors:
+        click.echo(f'  line {line}: {message}')
+    raise click.exceptions.Exit(1)
@@ -0,0 +1,76 @@
+import logging
+import time
+from collections import Counter
+
+from flask import g, request, current_app, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+class RequestStats:
+    """SQL activity recorded for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        self.queries += 1
+        self.sql_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """Statements executed more than `threshold` times, most frequent first"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+def current_stats():
+    return g.get('sql_stats') if has_request_context() else None
+
+def _endpoint():
+    return request.endpoint if has_request_context() else None
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if has_app_context() and elapsed * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, _endpoint() or '-', statement)
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_query_timer(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+def _start_request_stats():
+    g.sql_stats = RequestStats()
+
+def _report_request_stats(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    sql_ms = stats.sql_time * 1000
+
+    if current_app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'db;dur={sql_ms:.1f};desc="{stats.queries} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+    for statement, count in stats.repeated(current_app.config['N_PLUS_ONE_THRESHOLD']):
+        logger.warning('Possible N+1 in %s: statement ran %d times: %s', request.endpoint, count, statement)
+    logger.debug('%s %s (%s): %d queries, %.1f ms SQL, %.1f ms total',
+                 request.method, request.path, request.endpoint, stats.queries, sql_ms, total_ms)
+    return response
+
+def init_app(app):
+    app.before_request(_start_request_stats)
+    app.after_request(_report_request_stats)
@@ -0,0 +1,29 @@
+from sqlalchemy import select, func
+from app import db
+from models import Tenant, Payment
+
+def load_room_aggregates(rooms):
+    """Fill current_tenant and total_revenue for a page of rooms in two queries"""
+    rooms = list(rooms)
+    if not rooms:
+        return rooms
+    room_ids = [room.id for room in rooms]
+
+    tenants = {}
+    for tenant in db.session.scalars(
+        select(Tenant)
+        .where(Tenant.room_id.in_(room_ids), Tenant.is_active == True)
+        .order_by(Tenant.id)
+    ):
+        tenants.setdefault(tenant.room_id, tenant)
+
+    revenue = dict(db.session.execute(
+        select(Payment.room_id, func.sum(Payment.amount))
+        .where(Payment.room_id.in_(room_ids), Payment.status == 'paid')
+        .group_by(Payment.room_id)
+    ).all())
+
+    for room in rooms:
+        room._current_tenant = tenants.get(room.id)
+        room._total_revenue = revenue.get(room.id) or 0
+    return rooms
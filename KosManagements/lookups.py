@@ -0,0 +1,68 @@
+from sqlalchemy import select
+from app import db
+from models import Room, Tenant
+from search import KINDS_BY_NAME, query_terms, restrict
+
+TYPEAHEAD_LIMIT = 10
+
+# Room and tenant pickers show a short list and fetch the rest as the user
+# types; a submitted id is checked with one point lookup.
+
+def room_label(number, monthly_rent):
+    return f"Room {number} - ${monthly_rent}"
+
+def tenant_label(name, room_number):
+    return f"{name} - Room {room_number}"
+
+def available_rooms(user_id, text='', limit=TYPEAHEAD_LIMIT, include=None):
+    """[(id, label)] of the owner's available rooms by number, matching `text` if given.
+
+    `include` is a room id listed first even if it is occupied or outside
+    the top `limit`, such as the one a form currently has selected.
+    """
+    stmt = (select(Room.id, Room.number, Room.monthly_rent)
+            .where(Room.user_id == user_id, Room.status == 'available')
+            .order_by(Room.number).limit(limit))
+    terms = query_terms(text)
+    if terms:
+        stmt = restrict(stmt, KINDS_BY_NAME['room'], user_id, terms)
+    choices = [(row.id, room_label(row.number, row.monthly_rent)) for row in db.session.execute(stmt)]
+    return _with_included(choices, include, lambda room_id: find_room(user_id, room_id, allow=room_id))
+
+def active_tenants(user_id, text='', limit=TYPEAHEAD_LIMIT, include=None):
+    """[(id, label)] of the owner's active tenants by name, with their room number in the same query"""
+    stmt = (select(Tenant.id, Tenant.name, Room.number)
+            .join(Room, Room.id == Tenant.room_id)
+            .where(Tenant.user_id == user_id, Tenant.is_active == True)
+            .order_by(Tenant.name).limit(limit))
+    terms = query_terms(text)
+    if terms:
+        stmt = restrict(stmt, KINDS_BY_NAME['tenant'], user_id, terms)
+    choices = [(row.id, tenant_label(row.name, row.number)) for row in db.session.execute(stmt)]
+    return _with_included(choices, include, lambda tenant_id: find_tenant(user_id, tenant_id, allow=tenant_id))
+
+def _with_included(choices, include, lookup):
+    if include is None or any(value == include for value, _ in choices):
+        return choices
+    label = lookup(include)
+    return [(include, label)] + choices if label is not None else choices
+
+def find_room(user_id, room_id, allow=None):
+    """Label of the owner's room if it is available or is `allow`, else None"""
+    row = db.session.execute(
+        select(Room.number, Room.monthly_rent, Room.status).where(Room.id == room_id, Room.user_id == user_id)
+    ).first()
+    if row is None or (row.status != 'available' and room_id != allow):
+        return None
+    return room_label(row.number, row.monthly_rent)
+
+def find_tenant(user_id, tenant_id, allow=None):
+    """Label of the owner's tenant if it is active or is `allow`, else None"""
+    row = db.session.execute(
+        select(Tenant.name, Tenant.is_active, Room.number)
+        .join(Room, Room.id == Tenant.room_id)
+        .where(Tenant.id == tenant_id, Tenant.user_id == user_id)
+    ).first()
+    if row is None or (not row.is_active and tenant_id != allow):
+        return None
+    return tenant_label(row.name, row.number)
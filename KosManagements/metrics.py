@@ -0,0 +1,354 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request, abort, current_app
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from app import db
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+FLUSH_INTERVAL = 1.0
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), value if not isinstance(value, list) else list(value)]
+                    for key, value in self._values.items()]
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), mode='sum'):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode  # how live workers' values combine: sum or max
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # per-bucket counts (last slot is +Inf), then sum
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            entry[i] += 1
+            entry[-1] += value
+
+class Registry:
+    """Metrics for this process, optionally shared with sibling workers.
+
+    With a directory configured, each process writes a snapshot of its own
+    metrics to <directory>/<pid>.json (at most once per FLUSH_INTERVAL and on
+    every scrape), and a scrape merges all snapshots: counters and
+    histograms are summed across every process that ever wrote one, gauges
+    are combined (summed, or the maximum taken) only across processes that
+    are still alive. Clear the directory when the server is (re)started.
+    """
+
+    def __init__(self, directory=None):
+        self.metrics = {}
+        self.collectors = []
+        self._last_flush = 0.0
+        self._pending = None
+        self._flush_lock = threading.Lock()
+        self.configure(directory)
+
+    def configure(self, directory):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), mode='sum'):
+        return self.register(Gauge(name, documentation, labelnames, mode))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        for collect in self.collectors:
+            collect()
+        return {
+            name: {
+                'type': metric.kind,
+                'help': metric.documentation,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'mode': getattr(metric, 'mode', 'sum'),
+                'samples': metric.samples(),
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self, force=False):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            # Write the trailing updates later, so an idle worker is not left stale
+            with self._flush_lock:
+                if self._pending is None:
+                    self._pending = threading.Timer(FLUSH_INTERVAL, self.flush, kwargs={'force': True})
+                    self._pending.daemon = True
+                    self._pending.start()
+            return
+        with self._flush_lock:
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+            self._last_flush = now
+            path = os.path.join(self.directory, f'{os.getpid()}.json')
+            with open(f'{path}.tmp', 'w') as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(f'{path}.tmp', path)
+
+    def _snapshots(self):
+        if not self.directory:
+            yield True, self.snapshot()
+            return
+        self.flush(force=True)
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            yield _pid_alive(int(os.path.basename(path)[:-5])), data
+
+    def collect(self):
+        """Merge the snapshots of all processes into {name: (info, {labels: value})}"""
+        merged = {}
+        for alive, snapshot in self._snapshots():
+            for name, info in snapshot.items():
+                if info['type'] == 'gauge' and not alive:
+                    continue
+                _, values = merged.setdefault(name, (info, {}))
+                for key, value in info['samples']:
+                    key = tuple(key)
+                    if key not in values:
+                        values[key] = value
+                    elif isinstance(value, list):
+                        values[key] = [a + b for a, b in zip(values[key], value)]
+                    elif info['mode'] == 'max':
+                        values[key] = max(values[key], value)
+                    else:
+                        values[key] = values[key] + value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, (info, values) in sorted(self.collect().items()):
+            lines.append(f'# HELP {name} {info["help"]}')
+            lines.append(f'# TYPE {name} {info["type"]}')
+            labelnames = info['labelnames']
+            for key, value in sorted(values.items()):
+                labels = list(zip(labelnames, key))
+                if info['type'] != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip([*info['buckets'], '+Inf'], value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", _number(bound))])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+registry = Registry()
+
+REQUESTS = registry.counter('kos_http_requests_total', 'HTTP requests handled', ['endpoint', 'method', 'status'])
+REQUEST_DURATION = registry.histogram('kos_http_request_duration_seconds', 'Time spent handling a request', ['endpoint'])
+POOL_WAIT = registry.histogram('kos_db_pool_checkout_wait_seconds', 'Time waiting to check a connection out of the pool',
+                               ['bind'], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+POOL_TIMEOUTS = registry.counter('kos_db_pool_checkout_timeouts_total', 'Pool checkouts that timed out', ['bind'])
+POOL_HOLD = registry.histogram('kos_db_pool_hold_seconds', 'Time a connection stays checked out of the pool', ['bind'])
+DB_CONNECT = registry.histogram('kos_db_connect_seconds', 'Time to open a new database connection', ['bind'],
+                                buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+POOL_SIZE = registry.gauge('kos_db_pool_size', 'Configured pool size', ['bind'])
+POOL_CHECKED_OUT = registry.gauge('kos_db_pool_checked_out', 'Connections currently checked out', ['bind'])
+POOL_OVERFLOW = registry.gauge('kos_db_pool_overflow', 'Connections open beyond pool_size', ['bind'])
+CACHE_REQUESTS = registry.counter('kos_cache_requests_total', 'Owner cache lookups', ['name', 'result'])
+JOB_DURATION = registry.histogram('kos_job_duration_seconds', 'Background job and maintenance command run time',
+                                  ['job', 'outcome'], buckets=JOB_BUCKETS)
+JOB_LAST_SUCCESS = registry.gauge('kos_job_last_success_timestamp_seconds', 'Unix time the job last succeeded',
+                                  ['job'], mode='max')
+
+@contextmanager
+def track_job(name):
+    """Record the duration and outcome of one run of a background job"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+        JOB_LAST_SUCCESS.set(time.time(), job=name)
+    finally:
+        JOB_DURATION.observe(time.perf_counter() - started, job=name, outcome=outcome)
+        registry.flush()
+
+def _bind_label(key):
+    return key or 'default'
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection.
+
+    Pool events only fire once a connection has been handed out, so the
+    wait is measured around the public connect(). app.engine_options makes
+    this the pool class of every pooled engine; init_app names its bind.
+    """
+    bind_label = 'default'
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeout:
+            POOL_TIMEOUTS.inc(bind=self.bind_label)
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, bind=self.bind_label)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.bind_label = self.bind_label
+        return pool
+
+def instrument_engine(engine, bind='default'):
+    """Time connection hold and connect times with pool events; listeners on the engine outlive pool recreation"""
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.bind_label = bind
+
+    @event.listens_for(engine, 'do_connect')
+    def _connecting(dialect, connection_record, cargs, cparams):
+        connection_record.info['connect_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'connect')
+    def _connected(dbapi_connection, connection_record):
+        started = connection_record.info.pop('connect_started', None)
+        if started is not None:
+            DB_CONNECT.observe(time.perf_counter() - started, bind=bind)
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+
+    @event.listens_for(engine, 'checkin')
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is not None:
+            POOL_HOLD.observe(time.perf_counter() - started, bind=bind)
+
+def _collect_pool_stats():
+    try:
+        engines = db.engines
+    except RuntimeError:  # no app context
+        return
+    for key, engine in engines.items():
+        pool, bind = engine.pool, _bind_label(key)
+        if hasattr(pool, 'checkedout'):
+            POOL_SIZE.set(pool.size(), bind=bind)
+            POOL_CHECKED_OUT.set(pool.checkedout(), bind=bind)
+            POOL_OVERFLOW.set(max(pool.overflow(), 0), bind=bind)
+
+registry.collectors.append(_collect_pool_stats)
+
+def _start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    endpoint = request.endpoint or 'unmatched'
+    if started is not None and endpoint not in ('static', 'metrics'):
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+        registry.flush()
+    return response
+
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        abort(403)  # closed until a token is configured
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def init_app(app):
+    registry.configure(app.config['METRICS_DIR'])
+    with app.app_context():
+        for key, engine in db.engines.items():
+            instrument_engine(engine, _bind_label(key))
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,266 @@
+import importlib.util
+import os
+import re
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import select, func, inspect, text, insert, delete
+from flask.cli import AppGroup
+from app import db
+from models import Room, Tenant, Payment, Expense, SchemaMigration
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Helpers for migration scripts; every operation is safe to re-run so a
+# database created by db.create_all() can be stamped by simply upgrading.
+
+def create_index(conn, name, table, columns, unique=False):
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    conn.execute(text(f'CREATE {kind} IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
+
+def drop_index(conn, name):
+    conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+def has_column(conn, table, column):
+    return any(c['name'] == column for c in inspect(conn).get_columns(table))
+
+def drop_column(conn, table, column):
+    if has_column(conn, table, column):
+        conn.execute(text(f'ALTER TABLE {table} DROP COLUMN {column}'))
+
+def _foreign_key(conn, table, column):
+    return next((fk for fk in inspect(conn).get_foreign_keys(table) if fk['constrained_columns'] == [column]), None)
+
+def _foreign_key_clause(column, referred):
+    """Matches the FOREIGN KEY clause for column in a CREATE TABLE statement, with any ON DELETE action"""
+    return (rf'(FOREIGN KEY\s*\(\s*"?{column}"?\s*\)\s*REFERENCES\s+"?{referred}"?\s*\(\s*"?\w+"?\s*\))'
+            r'(\s+ON DELETE\s+(CASCADE|SET NULL|SET DEFAULT|RESTRICT|NO ACTION))?')
+
+def rebuild_table(conn, table, edit):
+    """Recreate a SQLite table from its CREATE TABLE statement as changed by edit(sql), keeping its rows.
+
+    This is the table rebuild procedure from the SQLite ALTER TABLE docs:
+    create the new table, copy the rows, drop the old table, rename the new
+    one into place and recreate the old table's indexes and triggers. It
+    must run with foreign keys off, so dropping the table fires no ON
+    DELETE actions; the migration runner arranges that and runs
+    foreign_key_check before committing.
+    """
+    if conn.exec_driver_sql('PRAGMA foreign_keys').scalar():
+        raise RuntimeError(f'Cannot rebuild {table} with foreign keys on; run it from a migration')
+    sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).scalar()
+    dependents = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).scalars().all()
+    columns = [row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')]
+    rebuilt = f'{table}_rebuild'
+    sql, count = re.subn(rf'^\s*CREATE TABLE\s+"?{table}"?', f'CREATE TABLE "{rebuilt}"', edit(sql), flags=re.IGNORECASE)
+    if count != 1:
+        raise RuntimeError(f'Cannot parse the definition of {table}')
+    conn.exec_driver_sql(sql)
+    kept = ', '.join(f'"{row[1]}"' for row in conn.exec_driver_sql(f'PRAGMA table_info("{rebuilt}")') if row[1] in columns)
+    conn.exec_driver_sql(f'INSERT INTO "{rebuilt}" ({kept}) SELECT {kept} FROM "{table}"')
+    conn.exec_driver_sql(f'DROP TABLE "{table}"')
+    conn.exec_driver_sql(f'ALTER TABLE "{rebuilt}" RENAME TO "{table}"')
+    for statement in dependents:
+        conn.exec_driver_sql(statement)
+
+def _edit_foreign_key(conn, table, column, pattern, replacement):
+    def edit(sql):
+        sql, count = re.compile(pattern, re.IGNORECASE).subn(replacement, sql)
+        if count != 1:
+            raise RuntimeError(f'Cannot find the foreign key on {table}.{column} in its table definition')
+        return sql
+    rebuild_table(conn, table, edit)
+
+def set_on_delete(conn, table, column, referred, action=None):
+    """Make the foreign key on table.column use ON DELETE `action` (None for the default).
+
+    SQLite cannot alter a constraint, so the table is rebuilt with the new one.
+    """
+    fk = _foreign_key(conn, table, column)
+    if fk is None or (fk['options'].get('ondelete') or '').upper() == (action or '').upper():
+        return
+    clause = f' ON DELETE {action}' if action else ''
+    if conn.dialect.name == 'sqlite':
+        _edit_foreign_key(conn, table, column, _foreign_key_clause(column, referred), lambda match: match.group(1) + clause)
+    else:
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT {fk["name"]}'))
+        conn.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT {fk["name"]} '
+                          f'FOREIGN KEY ({column}) REFERENCES {referred} (id){clause}'))
+
+def drop_foreign_key(conn, table, column):
+    """Drop the foreign key on table.column, e.g. so SQLite will let the column be dropped"""
+    fk = _foreign_key(conn, table, column)
+    if fk is None:
+        return
+    if conn.dialect.name == 'sqlite':
+        _edit_foreign_key(conn, table, column, r',\s*' + _foreign_key_clause(column, fk['referred_table']), '')
+    else:
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT {fk["name"]}'))
+
+def load_migrations():
+    """Return [(version, description, module)] sorted by version"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r'^(\d+)_\w+\.py$', filename)
+        if not match:
+            continue
+        spec = importlib.util.spec_from_file_location(f'migrations.m{match.group(1)}', os.path.join(MIGRATIONS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migrations.append((match.group(1), (module.__doc__ or filename).strip(), module))
+    return migrations
+
+def applied_versions():
+    return set(db.session.scalars(select(SchemaMigration.version)))
+
+def _run(step, record):
+    """Run one migration step and record it in a single transaction on a connection of its own.
+
+    On SQLite, foreign keys are switched off for the step, which SQLite
+    only allows outside a transaction, so rebuilt tables can be dropped
+    without cascading; they are checked before the commit instead. The
+    explicit BEGIN makes the step's DDL part of the transaction too.
+    """
+    db.session.close()
+    with db.engine.connect() as conn:
+        sqlite = conn.dialect.name == 'sqlite'
+        if sqlite:
+            conn.exec_driver_sql('PRAGMA foreign_keys = OFF')
+            conn.commit()
+        try:
+            with conn.begin():
+                if sqlite:
+                    conn.exec_driver_sql('BEGIN')
+                step(conn)
+                if sqlite:
+                    broken = conn.exec_driver_sql('PRAGMA foreign_key_check').all()
+                    if broken:
+                        raise RuntimeError(f'Migration left {len(broken)} row(s) with broken foreign keys: {broken[:5]}')
+                record(conn)
+        finally:
+            if sqlite:
+                conn.exec_driver_sql('PRAGMA foreign_keys = ON')
+                conn.commit()
+
+def upgrade(target=None):
+    """Create missing tables, then apply pending migrations up to target"""
+    db.create_all()
+    done = applied_versions()
+    applied = []
+    for version, description, module in load_migrations():
+        if target and version > target:
+            break
+        if version in done:
+            continue
+        _run(module.upgrade, lambda conn: conn.execute(
+            insert(SchemaMigration).values(version=version, description=description)))
+        applied.append(version)
+    return applied
+
+def downgrade(target=None):
+    """Revert applied migrations newer than target (default: the latest one)"""
+    done = applied_versions()
+    migrations = [m for m in load_migrations() if m[0] in done]
+    if target is None:
+        migrations = migrations[-1:]
+    else:
+        migrations = [m for m in migrations if m[0] > target]
+    reverted = []
+    for version, _, module in reversed(migrations):
+        _run(module.downgrade, lambda conn: conn.execute(
+            delete(SchemaMigration).where(SchemaMigration.version == version)))
+        reverted.append(version)
+    return reverted
+
+def hot_queries(user_id=1, today=None):
+    """The statements behind the busiest routes, for plan checks"""
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    return [
+        ('dashboard rooms', select(func.count(Room.id)).where(Room.user_id == user_id, Room.status == 'occupied')),
+        ('rooms listing', select(Room).where(Room.user_id == user_id, Room.status == 'available').order_by(Room.number)),
+        ('current tenants', select(Tenant).where(Tenant.room_id.in_([1, 2, 3]), Tenant.is_active == True)),
+        ('room revenue', select(Payment.room_id, func.sum(Payment.amount)).where(
+            Payment.room_id.in_([1, 2, 3]), Payment.status == 'paid').group_by(Payment.room_id)),
+        ('tenant balances', select(Payment.tenant_id, func.sum(Payment.amount)).where(
+            Payment.tenant_id.in_([1, 2, 3])).group_by(Payment.tenant_id)),
+        ('active tenants', select(Tenant).where(
+            Tenant.user_id == user_id, Tenant.is_active == True).order_by(Tenant.name)),
+        ('payments ledger', select(Payment).where(
+            Payment.user_id == user_id).order_by(Payment.due_date.desc(), Payment.id.desc())),
+        ('filtered ledger', select(Payment).where(
+            Payment.user_id == user_id, Payment.status == 'pending').order_by(Payment.due_date.desc(), Payment.id.desc())),
+        ('monthly revenue', select(func.sum(Payment.amount)).where(
+            Payment.user_id == user_id, Payment.status == 'paid', Payment.paid_date >= month_start)),
+        ('monthly expenses', select(func.sum(Expense.amount)).where(
+            Expense.user_id == user_id, Expense.date >= month_start, Expense.date < today + timedelta(days=1))),
+        ('overdue sweep', select(Payment.id).where(Payment.status == 'pending', Payment.due_date < today)),
+    ]
+
+def explain(conn, stmt):
+    """Return the query plan for stmt as a list of lines"""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+    return [row[0] for row in conn.exec_driver_sql(f'EXPLAIN {sql}')]
+
+def uses_index(plan):
+    """False if any table in the plan is read with a full scan"""
+    for line in plan:
+        if re.match(r'^\s*SCAN (TABLE )?\w+\s*$', line) or 'Seq Scan' in line:
+            return False
+    return True
+
+def check_indexes():
+    """EXPLAIN every hot query; returns [(name, ok, plan)]"""
+    conn = db.session.connection()
+    if conn.dialect.name == 'postgresql':
+        # Tiny tables make the planner prefer seq scans; ask whether an index could be used
+        conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    results = []
+    for name, stmt in hot_queries():
+        plan = explain(conn, stmt)
+        results.append((name, uses_index(plan), plan))
+    db.session.rollback()
+    return results
+
+@click.group('db', cls=AppGroup)
+def db_command():
+    """Schema migrations."""
+
+@db_command.command('upgrade')
+@click.option('--target', help='Stop after this version.')
+def upgrade_command(target):
+    """Apply pending migrations."""
+    applied = upgrade(target)
+    click.echo(f'Applied: {", ".join(applied)}' if applied else 'Already up to date')
+
+@db_command.command('downgrade')
+@click.option('--target', help='Revert everything newer than this version.')
+def downgrade_command(target):
+    """Revert the latest migration, or down to --target."""
+    reverted = downgrade(target)
+    click.echo(f'Reverted: {", ".join(reverted)}' if reverted else 'Nothing to revert')
+
+@db_command.command('current')
+def current_command():
+    """Show applied and pending migrations."""
+    done = applied_versions()
+    for version, description, _ in load_migrations():
+        click.echo(f'[{"x" if version in done else " "}] {version} {description}')
+
+@db_command.command('check-indexes')
+def check_indexes_command():
+    """EXPLAIN each hot query and fail if one needs a full table scan."""
+    failed = False
+    for name, ok, plan in check_indexes():
+        click.echo(f'{"ok  " if ok else "SCAN"} {name}')
+        if not ok:
+            failed = True
+            for line in plan:
+                click.echo(f'       {line}')
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,19 @@
+"""Composite indexes for the dashboard, ledger and report queries"""
+from migrate import create_index, drop_index
+
+INDEXES = [
+    ('ix_payment_room_status_paid', 'payment', ['room_id', 'status', 'paid_date']),
+    ('ix_payment_tenant_status', 'payment', ['tenant_id', 'status']),
+    ('ix_payment_status_due', 'payment', ['status', 'due_date']),
+    ('ix_tenant_room_active', 'tenant', ['room_id', 'is_active']),
+    ('ix_room_user_status_number', 'room', ['user_id', 'status', 'number']),
+    ('ix_expense_user_date', 'expense', ['user_id', 'date']),
+]
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
+
+def downgrade(conn):
+    for name, _, _ in INDEXES:
+        drop_index(conn, name)
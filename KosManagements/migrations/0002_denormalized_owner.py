@@ -0,0 +1,31 @@
+"""Denormalized user_id on payment and tenant with owner-first indexes"""
+from sqlalchemy import text
+from migrate import create_index, drop_index, has_column, drop_column, drop_foreign_key
+
+INDEXES = [
+    ('ix_tenant_user_active_name', 'tenant', ['user_id', 'is_active', 'name']),
+    ('ix_payment_user_due', 'payment', ['user_id', 'due_date', 'id']),
+    ('ix_payment_user_status_due', 'payment', ['user_id', 'status', 'due_date']),
+    ('ix_payment_user_status_paid', 'payment', ['user_id', 'status', 'paid_date', 'amount']),
+]
+
+def upgrade(conn):
+    for table in ('tenant', 'payment'):
+        if not has_column(conn, table, 'user_id'):
+            # SQLite cannot drop a column that carries a foreign key, which downgrade needs
+            reference = '' if conn.dialect.name == 'sqlite' else ' REFERENCES "user" (id)'
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN user_id INTEGER{reference}'))
+        conn.execute(text(
+            f'UPDATE {table} SET user_id = (SELECT room.user_id FROM room WHERE room.id = {table}.room_id) '
+            f'WHERE user_id IS NULL'
+        ))
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
+
+def downgrade(conn):
+    for name, _, _ in INDEXES:
+        drop_index(conn, name)
+    for table in ('tenant', 'payment'):
+        # Tables from db.create_all() carry the foreign key that upgrade leaves off on SQLite
+        drop_foreign_key(conn, table, 'user_id')
+        drop_column(conn, table, 'user_id')
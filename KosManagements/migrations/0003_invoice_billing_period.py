@@ -0,0 +1,12 @@
+"""Billing period on payment so generated invoices are unique per tenant and month"""
+from sqlalchemy import text
+from migrate import create_index, drop_index, has_column, drop_column
+
+def upgrade(conn):
+    if not has_column(conn, 'payment', 'billing_period'):
+        conn.execute(text('ALTER TABLE payment ADD COLUMN billing_period DATE'))
+    create_index(conn, 'ux_payment_tenant_period', 'payment', ['tenant_id', 'billing_period'], unique=True)
+
+def downgrade(conn):
+    drop_index(conn, 'ux_payment_tenant_period')
+    drop_column(conn, 'payment', 'billing_period')
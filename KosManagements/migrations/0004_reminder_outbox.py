@@ -0,0 +1,8 @@
+"""Outbox table for queued payment reminders"""
+from models import ReminderOutbox
+
+def upgrade(conn):
+    ReminderOutbox.__table__.create(conn, checkfirst=True)
+
+def downgrade(conn):
+    ReminderOutbox.__table__.drop(conn, checkfirst=True)
@@ -0,0 +1,16 @@
+"""Let the database cascade room and tenant deletes to their tenants and payments"""
+from migrate import set_on_delete
+
+FOREIGN_KEYS = [
+    ('tenant', 'room_id', 'room'),
+    ('payment', 'room_id', 'room'),
+    ('payment', 'tenant_id', 'tenant'),
+]
+
+def upgrade(conn):
+    for table, column, referred in FOREIGN_KEYS:
+        set_on_delete(conn, table, column, referred, 'CASCADE')
+
+def downgrade(conn):
+    for table, column, referred in FOREIGN_KEYS:
+        set_on_delete(conn, table, column, referred, None)
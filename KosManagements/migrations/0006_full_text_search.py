@@ -0,0 +1,8 @@
+"""Full-text indexes over tenants, rooms, payment notes and expenses"""
+import search
+
+def upgrade(conn):
+    search.install(conn)
+
+def downgrade(conn):
+    search.uninstall(conn)
@@ -1,9 +1,23 @@
+from flask import current_app, has_app_context
 from app import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date
 from sqlalchemy import func
 
+class LazyQueryError(RuntimeError):
+    """Raised in strict mode when a per-row property falls back to its own query"""
+
+def check_lazy_query(obj, name):
+    """Guard for model properties that query the database per instance.
+
+    With STRICT_BATCH_LOADING enabled (meant for tests) a property that was
+    not filled by a batch loader raises instead of silently issuing one
+    query per row.
+    """
+    if has_app_context() and current_app.config.get('STRICT_BATCH_LOADING'):
+        raise LazyQueryError(f'{type(obj).__name__}.{name} was not batch-loaded for id={obj.id}')
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -22,6 +36,10 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 class Room(db.Model):
+    __table_args__ = (
+        db.Index('ix_room_user_status_number', 'user_id', 'status', 'number'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(20), nullable=False)
     description = db.Column(db.Text)
@@ -31,18 +49,30 @@ class Room(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     # Relationships
-    tenants = db.relationship('Tenant', backref='room', lazy=True, cascade='all, delete-orphan')
-    payments = db.relationship('Payment', backref='room', lazy=True, cascade='all, delete-orphan')
+    # The database deletes a room's tenants and payments (ON DELETE CASCADE); the ORM does not load them first
+    tenants = db.relationship('Tenant', backref='room', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    payments = db.relationship('Payment', backref='room', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
     @property
     def current_tenant(self):
+        if hasattr(self, '_current_tenant'):
+            return self._current_tenant
+        check_lazy_query(self, 'current_tenant')
         return Tenant.query.filter_by(room_id=self.id, is_active=True).first()
     
     @property
     def total_revenue(self):
+        if hasattr(self, '_total_revenue'):
+            return self._total_revenue
+        check_lazy_query(self, 'total_revenue')
         return db.session.query(func.sum(Payment.amount)).filter_by(room_id=self.id, status='paid').scalar() or 0
 
 class Tenant(db.Model):
+    __table_args__ = (
+        db.Index('ix_tenant_room_active', 'room_id', 'is_active'),
+        db.Index('ix_tenant_user_active_name', 'user_id', 'is_active', 'name'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20))
@@ -51,35 +81,61 @@ class Tenant(db.Model):
     end_date = db.Column(db.Date)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # denormalized from room
     
     # Relationships
-    payments = db.relationship('Payment', backref='tenant', lazy=True, cascade='all, delete-orphan')
+    payments = db.relationship('Payment', backref='tenant', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
     @property
     def total_paid(self):
+        if hasattr(self, '_total_paid'):
+            return self._total_paid
+        check_lazy_query(self, 'total_paid')
         return db.session.query(func.sum(Payment.amount)).filter_by(tenant_id=self.id, status='paid').scalar() or 0
     
     @property
     def outstanding_amount(self):
-        return db.session.query(func.sum(Payment.amount)).filter_by(tenant_id=self.id, status='pending').scalar() or 0
+        if hasattr(self, '_outstanding_amount'):
+            return self._outstanding_amount
+        check_lazy_query(self, 'outstanding_amount')
+        return db.session.query(func.sum(Payment.amount)).filter(
+            Payment.tenant_id == self.id,
+            Payment.status.in_(('pending', 'overdue'))
+        ).scalar() or 0
 
 class Payment(db.Model):
+    __table_args__ = (
+        db.Index('ix_payment_room_status_paid', 'room_id', 'status', 'paid_date'),
+        db.Index('ix_payment_tenant_status', 'tenant_id', 'status'),
+        db.Index('ix_payment_status_due', 'status', 'due_date'),
+        db.Index('ix_payment_user_due', 'user_id', 'due_date', 'id'),
+        db.Index('ix_payment_user_status_due', 'user_id', 'status', 'due_date'),
+        db.Index('ix_payment_user_status_paid', 'user_id', 'status', 'paid_date', 'amount'),
+        db.Index('ux_payment_tenant_period', 'tenant_id', 'billing_period', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)
     due_date = db.Column(db.Date, nullable=False)
     paid_date = db.Column(db.Date)
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, paid, overdue
     notes = db.Column(db.Text)
+    billing_period = db.Column(db.Date)  # first day of the invoiced month, set by generated invoices
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='CASCADE'), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # denormalized from room
     
     @property
     def is_overdue(self):
         return self.status == 'pending' and self.due_date < date.today()
 
 class Expense(db.Model):
+    __table_args__ = (
+        db.Index('ix_expense_user_date', 'user_id', 'date'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
     amount = db.Column(db.Float, nullable=False)
@@ -88,3 +144,45 @@ class Expense(db.Model):
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+class JobRun(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    last_run_at = db.Column(db.DateTime, nullable=False)
+    rows_affected = db.Column(db.Integer, default=0)
+
+class MonthlyRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    expenses = db.Column(db.Float, nullable=False, default=0)
+
+class SchemaMigration(db.Model):
+    version = db.Column(db.String(20), primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DataVersion(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True)  # 0 tracks bulk changes across all owners
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ReminderOutbox(db.Model):
+    __table_args__ = (
+        db.Index('ux_reminder_payment_kind_channel', 'payment_id', 'kind', 'channel', unique=True),
+        db.Index('ix_reminder_status_next', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payment.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # upcoming, overdue
+    channel = db.Column(db.String(20), nullable=False)  # email, sms
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200))
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,192 @@
+import calendar
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from itertools import accumulate
+
+from sqlalchemy import select, and_
+from app import db
+from models import Room, Tenant
+from reports import month_start, add_months, iter_months
+from utils import calculate_occupancy_rate
+
+GRANULARITIES = ('day', 'month')
+
+@dataclass(frozen=True)
+class OccupancyPeriod:
+    start: date
+    room_days: int  # days rooms were let or lettable
+    occupied_days: int
+    lost_rent: float  # rent the vacant days would have brought in
+
+    @property
+    def vacancy_days(self):
+        return self.room_days - self.occupied_days
+
+    @property
+    def occupancy_rate(self):
+        return calculate_occupancy_rate(self.room_days, self.occupied_days)
+
+    def to_dict(self):
+        data = asdict(self)
+        data['start'] = self.start.isoformat()
+        data['vacancy_days'] = self.vacancy_days
+        data['occupancy_rate'] = self.occupancy_rate
+        return data
+
+@dataclass(frozen=True)
+class RoomVacancy:
+    room_id: int
+    number: str
+    room_days: int
+    occupied_days: int
+    lost_rent: float
+
+    @property
+    def vacancy_days(self):
+        return self.room_days - self.occupied_days
+
+    def to_dict(self):
+        data = asdict(self)
+        data['vacancy_days'] = self.vacancy_days
+        return data
+
+@dataclass(frozen=True)
+class OccupancyReport:
+    start: date
+    end: date  # exclusive
+    granularity: str
+    periods: tuple
+    rooms: tuple
+
+    @property
+    def room_days(self):
+        return sum(period.room_days for period in self.periods)
+
+    @property
+    def occupied_days(self):
+        return sum(period.occupied_days for period in self.periods)
+
+    @property
+    def vacancy_days(self):
+        return self.room_days - self.occupied_days
+
+    @property
+    def occupancy_rate(self):
+        return calculate_occupancy_rate(self.room_days, self.occupied_days)
+
+    @property
+    def lost_rent(self):
+        return sum(period.lost_rent for period in self.periods)
+
+    def to_dict(self):
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'granularity': self.granularity,
+            'room_days': self.room_days,
+            'occupied_days': self.occupied_days,
+            'vacancy_days': self.vacancy_days,
+            'occupancy_rate': self.occupancy_rate,
+            'lost_rent': self.lost_rent,
+            'periods': [period.to_dict() for period in self.periods],
+            'rooms': [room.to_dict() for room in self.rooms],
+        }
+
+def _period_bounds(start, end, granularity):
+    """Day offsets where each period of [start, end) begins, plus the end"""
+    if granularity == 'day':
+        return list(range((end - start).days + 1))
+    return [0] + [(month - start).days for month in iter_months(start, end)][1:] + [(end - start).days]
+
+def compute_occupancy(rooms, tenancies, start, end, granularity='month'):
+    """Reconstruct occupancy over [start, end) from tenancy intervals.
+
+    `rooms` are (id, number, monthly_rent, in_service) and `tenancies` are
+    (room_id, first_day, last_day or None) with both days occupied. Each
+    room's intervals are sorted and merged in one sweep, then occupied and
+    lettable rooms become +1/-1 boundary events whose running sums give
+    the count for every day. The cost is linear in tenancies plus days,
+    never rooms times days. A vacant day loses 1/length-of-its-month of
+    the room's monthly rent.
+    """
+    days = (end - start).days
+    if days <= 0:
+        return OccupancyReport(start, end, granularity, (), ())
+
+    def offset(day):
+        return min(max((day - start).days, 0), days)
+
+    # share[i]: months' worth of rent in the first i days, so a span's rent is a difference
+    share = [0.0] + list(accumulate(
+        1 / calendar.monthrange(day.year, day.month)[1]
+        for day in (start + timedelta(days=i) for i in range(days))
+    ))
+
+    lettable, occupied = [0] * (days + 1), [0] * (days + 1)
+    lettable_rent, occupied_rent = [0.0] * (days + 1), [0.0] * (days + 1)
+    by_room = {}
+    # An open-ended tenancy sorts after a closed one starting the same day, as if it ended on date.max
+    for room_id, first_day, last_day in sorted(tenancies, key=lambda t: (t[0], t[1], t[2] or date.max)):
+        by_room.setdefault(room_id, []).append((offset(first_day), days if last_day is None else offset(last_day + timedelta(days=1))))
+
+    room_results = []
+    for room_id, number, rent, in_service in rooms:
+        intervals = by_room.get(room_id, [])
+        # A room counts from its creation, or its first tenant if that came earlier
+        opened = min([offset(in_service)] + [begin for begin, _ in intervals])
+        lettable[opened] += 1
+        lettable_rent[opened] += rent
+
+        occupied_days, occupied_share = 0, 0.0
+        current_begin = current_end = None
+        for begin, finish in intervals + [(days + 1, days + 1)]:
+            if current_end is not None and begin <= current_end:
+                current_end = max(current_end, finish)
+                continue
+            if current_end is not None and current_end > current_begin:
+                occupied[current_begin] += 1
+                occupied[current_end] -= 1
+                occupied_rent[current_begin] += rent
+                occupied_rent[current_end] -= rent
+                occupied_days += current_end - current_begin
+                occupied_share += share[current_end] - share[current_begin]
+            current_begin, current_end = begin, finish
+
+        room_days = days - opened
+        lost = rent * (share[days] - share[opened] - occupied_share)
+        room_results.append(RoomVacancy(room_id, number, room_days, occupied_days, round(lost, 2)))
+
+    lettable_counts, occupied_counts = list(accumulate(lettable)), list(accumulate(occupied))
+    vacant_rent = [a - b for a, b in zip(accumulate(lettable_rent), accumulate(occupied_rent))]
+    lettable_sums, occupied_sums = [0] + list(accumulate(lettable_counts)), [0] + list(accumulate(occupied_counts))
+    lost_sums = [0.0] + list(accumulate(rent * (share[i + 1] - share[i]) for i, rent in enumerate(vacant_rent[:days])))
+
+    periods = []
+    bounds = _period_bounds(start, end, granularity)
+    for begin, finish in zip(bounds, bounds[1:]):
+        periods.append(OccupancyPeriod(
+            start + timedelta(days=begin),
+            lettable_sums[finish] - lettable_sums[begin],
+            occupied_sums[finish] - occupied_sums[begin],
+            round(lost_sums[finish] - lost_sums[begin], 2),
+        ))
+    return OccupancyReport(start, end, granularity, tuple(periods), tuple(room_results))
+
+def occupancy_report(user_id, start, end, granularity='month'):
+    """Occupancy of one owner's rooms over [start, end), from one query"""
+    rows = db.session.execute(
+        select(Room.id, Room.number, Room.monthly_rent, Room.created_at, Tenant.start_date, Tenant.end_date)
+        .outerjoin(Tenant, and_(Tenant.room_id == Room.id, Tenant.start_date < end))
+        .where(Room.user_id == user_id)
+    ).all()
+    rooms, tenancies = {}, []
+    for room_id, number, rent, created_at, first_day, last_day in rows:
+        rooms[room_id] = (room_id, number, rent, created_at.date() if created_at else start)
+        if first_day is not None:
+            tenancies.append((room_id, first_day, last_day))
+    return compute_occupancy(list(rooms.values()), tenancies, start, end, granularity)
+
+def trailing_occupancy(user_id, months=12, granularity='month', today=None):
+    """Occupancy for the last `months` calendar months up to and including today"""
+    today = today or date.today()
+    return occupancy_report(user_id, add_months(month_start(today), 1 - months), today + timedelta(days=1), granularity)
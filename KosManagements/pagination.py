@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import date
+from sqlalchemy import select, func, and_, or_
+from app import db
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value, row_id, direction):
+    payload = json.dumps([sort_value.isoformat(), row_id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return date.fromisoformat(sort_value), int(row_id), direction
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(token) from exc
+
+class KeysetPage:
+    """One page of a (sort_column DESC, id DESC) keyset pagination"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, total_is_estimate=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def keyset_paginate(stmt, sort_column, id_column, cursor=None, per_page=15, count_limit=None, options=()):
+    """Paginate a select() newest-first on (sort_column, id_column).
+
+    Each page is a single indexed range scan regardless of depth. When
+    count_limit is given, the total is counted up to that many rows; a
+    result equal to the cap is reported as an estimate ("1000+").
+    """
+    sort_value, row_id, direction = decode_cursor(cursor) if cursor else (None, None, 'next')
+
+    page_stmt = stmt.options(*options)
+    if sort_value is not None:
+        if direction == 'next':
+            page_stmt = page_stmt.where(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id),
+            ))
+        else:
+            page_stmt = page_stmt.where(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id),
+            ))
+
+    if direction == 'next':
+        page_stmt = page_stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        page_stmt = page_stmt.order_by(sort_column.asc(), id_column.asc())
+
+    rows = db.session.scalars(page_stmt.limit(per_page + 1)).unique().all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def token(row, to):
+        return encode_cursor(getattr(row, sort_column.key), getattr(row, id_column.key), to)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'prev' or has_more:
+            next_cursor = token(rows[-1], 'next')
+        if (direction == 'next' and sort_value is not None) or (direction == 'prev' and has_more):
+            prev_cursor = token(rows[0], 'prev')
+
+    total = None
+    total_is_estimate = False
+    if count_limit:
+        capped = stmt.with_only_columns(id_column).limit(count_limit).subquery()
+        total = db.session.scalar(select(func.count()).select_from(capped))
+        total_is_estimate = total >= count_limit
+
+    return KeysetPage(rows, next_cursor, prev_cursor, total, total_is_estimate)
@@ -0,0 +1,381 @@
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+import click
+from sqlalchemy import select, insert, update, and_, or_, case, exists
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from models import Room, Tenant, Payment, ReminderOutbox
+from metrics import track_job
+
+INSERT_CHUNK = 1000
+CLAIM_BATCH = 500
+LEASE = timedelta(minutes=10)  # a claimed message is retried if its worker never reports back
+
+logger = logging.getLogger(__name__)
+
+class DeliveryError(Exception):
+    pass
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` sends per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class SmtpSender:
+    """Send email over SMTP, keeping one open connection per worker thread"""
+
+    def __init__(self, host, port=25, username=None, password=None, sender=None, starttls=False, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.starttls = starttls
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def send(self, recipient, subject, body):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = subject
+        message.set_content(body)
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None) or self._connect()
+            self._local.conn = conn
+            try:
+                conn.send_message(message)
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._local.conn = None
+                if attempt:
+                    raise
+            except (smtplib.SMTPException, OSError) as exc:
+                raise DeliveryError(str(exc)) from exc
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+class TwilioSender:
+    """Send SMS through Twilio"""
+
+    def __init__(self, account_sid, auth_token, from_number):
+        from twilio.rest import Client  # optional dependency, only needed for SMS
+        self.client = Client(account_sid, auth_token)
+        self.from_number = from_number
+
+    def send(self, recipient, subject, body):
+        try:
+            self.client.messages.create(body=body, from_=self.from_number, to=recipient)
+        except Exception as exc:
+            raise DeliveryError(str(exc)) from exc
+
+    def close(self):
+        pass
+
+class LogSender:
+    """Log messages instead of sending them, for channels without a provider"""
+
+    def send(self, recipient, subject, body):
+        logger.info('REMINDER to %s: %s', recipient, body)
+
+    def close(self):
+        pass
+
+class MemorySender:
+    """Collect messages in memory; the in-process stand-in for tests"""
+
+    def __init__(self):
+        self.outbox = []
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, body):
+        with self._lock:
+            self.outbox.append((recipient, subject, body))
+
+    def close(self):
+        pass
+
+def make_senders(config):
+    """Build {channel: sender} from the REMINDER_* settings"""
+    smtp_host = config['REMINDER_SMTP_HOST']
+    if smtp_host == 'memory://':
+        email = MemorySender()
+    elif smtp_host:
+        email = SmtpSender(smtp_host, config['REMINDER_SMTP_PORT'], config['REMINDER_SMTP_USER'],
+                           config['REMINDER_SMTP_PASSWORD'], config['REMINDER_FROM'], config['REMINDER_SMTP_STARTTLS'])
+    else:
+        email = LogSender()
+    if config['TWILIO_SID']:
+        sms = TwilioSender(config['TWILIO_SID'], config['TWILIO_TOKEN'], config['TWILIO_PHONE'])
+    else:
+        sms = LogSender()
+    return {'email': email, 'sms': sms}
+
+def parse_rate_limits(value):
+    """Parse 'email=10,sms=1' into {'email': 10.0, 'sms': 1.0} sends per second"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        channel, rate = item.split('=')
+        limits[channel.strip()] = float(rate)
+    return limits
+
+def render_reminder(kind, payment):
+    amount = f'${payment.amount:,.2f}'
+    if kind == 'overdue':
+        subject = 'Rent payment overdue'
+        body = (f'Hi {payment.tenant_name}, your rent payment of {amount} for Room {payment.room_number} '
+                f'was due on {payment.due_date:%d %B %Y} and is now overdue.')
+    else:
+        subject = 'Rent payment reminder'
+        body = (f'Hi {payment.tenant_name}, your rent payment of {amount} for Room {payment.room_number} '
+                f'is due on {payment.due_date:%d %B %Y}.')
+    return subject, body
+
+@track_job('enqueue_reminders')
+def enqueue_reminders(today=None, days_ahead=None, user_id=None):
+    """Queue upcoming and overdue reminders for every active tenant.
+
+    Candidates come from one query; a payment that already has a reminder
+    of the same kind in the outbox is skipped, so re-running only queues
+    what is new. Returns the number of messages queued.
+    """
+    today = today or date.today()
+    if days_ahead is None:
+        days_ahead = current_app.config['REMINDER_DAYS_AHEAD']
+    kind = case((or_(Payment.status == 'overdue', Payment.due_date < today), 'overdue'), else_='upcoming')
+    stmt = (
+        select(Payment.id, Payment.user_id, Payment.amount, Payment.due_date, kind.label('kind'),
+               Tenant.name.label('tenant_name'), Tenant.email, Tenant.phone, Room.number.label('room_number'))
+        .join(Tenant, Payment.tenant_id == Tenant.id)
+        .join(Room, Payment.room_id == Room.id)
+        .where(
+            Tenant.is_active == True,
+            or_(Payment.status == 'overdue',
+                and_(Payment.status == 'pending', Payment.due_date <= today + timedelta(days=days_ahead))),
+            ~exists().where(ReminderOutbox.payment_id == Payment.id, ReminderOutbox.kind == kind),
+        )
+    )
+    if user_id is not None:
+        stmt = stmt.where(Payment.user_id == user_id)
+
+    now = datetime.utcnow()
+    rows = []
+    for payment in db.session.execute(stmt):
+        for channel, recipient in (('email', payment.email), ('sms', payment.phone)):
+            if not recipient:
+                continue
+            subject, body = render_reminder(payment.kind, payment)
+            rows.append({
+                'payment_id': payment.id,
+                'user_id': payment.user_id,
+                'kind': payment.kind,
+                'channel': channel,
+                'recipient': recipient,
+                'subject': subject,
+                'body': body,
+                'status': 'queued',
+                'attempts': 0,
+                'next_attempt_at': now,
+                'created_at': now,
+            })
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(ReminderOutbox.__table__), rows[i:i + INSERT_CHUNK])
+    db.session.commit()
+    return len(rows)
+
+def cancel_paid_reminders():
+    """Drop queued reminders whose payment has been settled since it was queued"""
+    result = db.session.execute(
+        update(ReminderOutbox)
+        .where(ReminderOutbox.status.in_(('queued', 'sending')),
+               ReminderOutbox.payment_id.in_(select(Payment.id).where(Payment.status == 'paid')))
+        .values(status='cancelled')
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def claim_batch(limit=CLAIM_BATCH, due_before=None):
+    """Lease up to `limit` messages due by `due_before` (default now) to this process.
+
+    The claim is one conditional UPDATE ... RETURNING, so a row already
+    leased by another dispatcher no longer matches and is never returned
+    twice. Claimed rows move to 'sending' with a lease counted from now; if
+    the process dies before recording the outcome, the lease expires and
+    another run retries them. On Postgres, SKIP LOCKED lets several
+    dispatchers claim disjoint batches in parallel.
+    """
+    now = datetime.utcnow()
+    due = (ReminderOutbox.status.in_(('queued', 'sending')), ReminderOutbox.next_attempt_at <= (due_before or now))
+    candidates = (
+        select(ReminderOutbox.id)
+        .where(*due)
+        .order_by(ReminderOutbox.next_attempt_at, ReminderOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(ReminderOutbox)
+        .where(ReminderOutbox.id.in_(candidates), *due)
+        .values(status='sending', next_attempt_at=now + LEASE)
+        .returning(ReminderOutbox.id, ReminderOutbox.channel, ReminderOutbox.recipient,
+                   ReminderOutbox.subject, ReminderOutbox.body, ReminderOutbox.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return rows
+
+def _deliver(senders, limiters, message):
+    """Send one message from a worker thread; returns (id, error or None)"""
+    sender = senders.get(message.channel)
+    if sender is None:
+        return message.id, f'No sender for channel {message.channel!r}'
+    limiter = limiters.get(message.channel)
+    if limiter is not None:
+        limiter.acquire()
+    try:
+        sender.send(message.recipient, message.subject, message.body)
+    except Exception as exc:
+        logger.warning('Reminder %d via %s failed: %s', message.id, message.channel, exc)
+        return message.id, str(exc) or exc.__class__.__name__
+    return message.id, None
+
+def _record_results(batch, results, now):
+    attempts = {message.id: message.attempts + 1 for message in batch}
+    sent = [message_id for message_id, error in results if error is None]
+    if sent:
+        db.session.execute(
+            update(ReminderOutbox)
+            .where(ReminderOutbox.id.in_(sent))
+            .values(status='sent', sent_at=now, attempts=ReminderOutbox.attempts + 1, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    max_attempts = current_app.config['REMINDER_MAX_ATTEMPTS']
+    failed = 0
+    for message_id, error in results:
+        if error is None:
+            continue
+        tries = attempts[message_id]
+        gave_up = tries >= max_attempts
+        failed += gave_up
+        db.session.execute(
+            update(ReminderOutbox)
+            .where(ReminderOutbox.id == message_id)
+            .values(status='failed' if gave_up else 'queued', attempts=tries, last_error=error[:1000],
+                    next_attempt_at=now + timedelta(seconds=min(60 * 2 ** tries, 6 * 60 * 60)))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return len(sent), failed
+
+@track_job('dispatch_reminders')
+def dispatch_reminders(senders=None, workers=None, rate_limits=None, batch_size=CLAIM_BATCH):
+    """Send every due message in the outbox using a pool of worker threads.
+
+    The database is only touched from the calling thread: batches are
+    claimed, handed to the pool, and their outcomes written back with one
+    UPDATE for the successes. Failures are retried with exponential backoff
+    until REMINDER_MAX_ATTEMPTS. Returns (sent, failed) counts.
+    """
+    own_senders = senders is None
+    senders = senders if senders is not None else make_senders(current_app.config)
+    workers = workers or current_app.config['REMINDER_WORKERS']
+    if rate_limits is None:
+        rate_limits = parse_rate_limits(current_app.config['REMINDER_RATE_LIMITS'])
+    limiters = {channel: RateLimiter(rate) for channel, rate in rate_limits.items()}
+
+    cancel_paid_reminders()
+    db.session.commit()
+    sent = failed = 0
+    started = datetime.utcnow()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reminder') as pool:
+            while True:
+                # Only messages due when the run started, so retries wait for the next run
+                batch = claim_batch(batch_size, due_before=started)
+                if not batch:
+                    break
+                results = list(pool.map(lambda message: _deliver(senders, limiters, message), batch))
+                batch_sent, batch_failed = _record_results(batch, results, datetime.utcnow())
+                sent += batch_sent
+                failed += batch_failed
+    finally:
+        if own_senders:
+            for sender in senders.values():
+                sender.close()
+    logger.info('Reminder dispatch sent %d message(s), %d failed permanently', sent, failed)
+    return sent, failed
+
+def start_dispatcher(flask_app, interval):
+    """Start a daemon thread that queues and sends reminders every interval seconds"""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            with flask_app.app_context():
+                try:
+                    enqueue_reminders()
+                    dispatch_reminders()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Reminder dispatch failed')
+            stop.wait(interval)
+
+    thread = threading.Thread(target=loop, name='reminder-dispatcher', daemon=True)
+    thread.start()
+    return stop
+
+@click.command('send-reminders')
+@with_appcontext
+@click.option('--days-ahead', type=int, help='Remind about pending payments due within this many days.')
+@click.option('--workers', type=int, help='Number of concurrent sender threads.')
+@click.option('--no-enqueue', is_flag=True, help='Only send messages already in the outbox.')
+def send_reminders_command(days_ahead, workers, no_enqueue):
+    """Queue upcoming and overdue payment reminders and send them."""
+    if not no_enqueue:
+        queued = enqueue_reminders(days_ahead=days_ahead)
+        click.echo(f'Queued {queued} reminder(s)')
+    sent, failed = dispatch_reminders(workers=workers)
+    click.echo(f'Sent {sent} reminder(s), {failed} failed permanently')
@@ -0,0 +1,250 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import click
+from sqlalchemy import select, delete, insert, func, extract, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from flask.cli import with_appcontext
+from app import db
+from models import Room, Payment, Expense, MonthlyRollup, JobRun
+
+ROLLUP_JOB = 'rollup_backfill'
+
+@dataclass(frozen=True)
+class ExpenseSummary:
+    date: date
+    description: str
+    category: str
+    amount: float
+    notes: str
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+def add_months(value, months):
+    years, month = divmod(value.month - 1 + months, 12)
+    return date(value.year + years, month + 1, 1)
+
+def iter_months(start, end):
+    """Yield the first day of every month overlapping [start, end)"""
+    current = month_start(start)
+    while current < end:
+        yield current
+        current = add_months(current, 1)
+
+def _revenue_by_month(start, end, user_id=None):
+    year, month = extract('year', Payment.paid_date), extract('month', Payment.paid_date)
+    stmt = select(Payment.user_id, year, month, func.sum(Payment.amount)).where(
+        Payment.status == 'paid',
+        Payment.paid_date >= start,
+        Payment.paid_date < end,
+    ).group_by(Payment.user_id, year, month)
+    return stmt.where(Payment.user_id == user_id) if user_id is not None else stmt
+
+def _expenses_by_month(start, end, user_id=None):
+    year, month = extract('year', Expense.date), extract('month', Expense.date)
+    stmt = select(Expense.user_id, year, month, func.sum(Expense.amount)).where(
+        Expense.date >= start,
+        Expense.date < end,
+    ).group_by(Expense.user_id, year, month)
+    return stmt.where(Expense.user_id == user_id) if user_id is not None else stmt
+
+def ledger_monthly_totals(connection, start, end, user_id=None):
+    """Sum paid revenue and expenses per (owner, month) in [start, end).
+
+    Both ledgers are filtered on plain date ranges so indexes on
+    Payment.paid_date and Expense.date stay usable; each table costs one
+    GROUP BY query.
+    """
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for owner, year, month, amount in connection.execute(_revenue_by_month(start, end, user_id)):
+        totals[(owner, date(int(year), int(month), 1))][0] = float(amount or 0)
+    for owner, year, month, amount in connection.execute(_expenses_by_month(start, end, user_id)):
+        totals[(owner, date(int(year), int(month), 1))][1] = float(amount or 0)
+    return totals
+
+def monthly_revenue(user_id, months=6, today=None):
+    """Paid revenue for the last `months` calendar months, oldest first, in one query"""
+    current = month_start(today or date.today())
+    start, end = add_months(current, 1 - months), add_months(current, 1)
+    totals = {
+        date(int(year), int(month), 1): float(amount or 0)
+        for _, year, month, amount in db.session.execute(_revenue_by_month(start, end, user_id))
+    }
+    return [
+        {'year': month.year, 'month': month.strftime('%B'), 'revenue': totals.get(month, 0.0)}
+        for month in iter_months(start, end)
+    ]
+
+def _build_rows(totals, start, end):
+    rows = []
+    for month in iter_months(start, end):
+        revenue, expenses = totals.get(month, (0.0, 0.0))
+        rows.append({
+            'year': month.year,
+            'month': month.month,
+            'revenue': revenue,
+            'expenses': expenses,
+            'profit': revenue - expenses,
+        })
+    return rows
+
+def rollups_ready():
+    return db.session.get(JobRun, ROLLUP_JOB) is not None
+
+def monthly_report(user_id, start, end):
+    """Revenue, expenses and profit for every month in [start, end)"""
+    if rollups_ready():
+        totals = {
+            r.month: (r.revenue, r.expenses)
+            for r in MonthlyRollup.query.filter(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month >= month_start(start),
+                MonthlyRollup.month < end,
+            )
+        }
+    else:
+        totals = {
+            month: tuple(values)
+            for (_, month), values in ledger_monthly_totals(db.session.connection(), start, end, user_id).items()
+        }
+    return _build_rows(totals, start, end)
+
+def report_totals(user_id):
+    """All-time (revenue, expenses) for one owner"""
+    if rollups_ready():
+        revenue, expenses = db.session.query(
+            func.coalesce(func.sum(MonthlyRollup.revenue), 0),
+            func.coalesce(func.sum(MonthlyRollup.expenses), 0),
+        ).filter(MonthlyRollup.user_id == user_id).one()
+        return revenue, expenses
+
+    revenue = db.session.query(func.sum(Payment.amount)).filter(
+        Payment.user_id == user_id,
+        Payment.status == 'paid'
+    ).scalar() or 0
+    expenses = db.session.query(func.sum(Expense.amount)).filter_by(user_id=user_id).scalar() or 0
+    return revenue, expenses
+
+def get_recent_expenses(user_id, limit=10):
+    rows = db.session.execute(
+        select(Expense.date, Expense.description, Expense.category, Expense.amount, Expense.notes)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date.desc())
+        .limit(limit)
+    ).all()
+    return [ExpenseSummary(*row) for row in rows]
+
+def _upsert_rollups(connection, rows):
+    """Insert rollup rows, overwriting any a concurrent transaction already wrote for the same key"""
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(MonthlyRollup)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.user_id, MonthlyRollup.month],
+        set_={'revenue': stmt.excluded.revenue, 'expenses': stmt.excluded.expenses},
+    ), rows)
+
+def refresh_rollups(connection, keys):
+    """Recompute the rollup rows for a set of (user_id, month) keys"""
+    by_owner = defaultdict(set)
+    for user_id, month in keys:
+        by_owner[user_id].add(month)
+
+    for user_id, months in sorted(by_owner.items()):
+        start, end = min(months), add_months(max(months), 1)
+        totals = ledger_monthly_totals(connection, start, end, user_id)
+        # Upserted rather than deleted and reinserted, so two writers refreshing
+        # the same month cannot both insert it; months left empty are removed
+        rows = [
+            {'user_id': user_id, 'month': month, 'revenue': totals[(user_id, month)][0],
+             'expenses': totals[(user_id, month)][1]}
+            for month in sorted(months) if (user_id, month) in totals
+        ]
+        empty = months - {row['month'] for row in rows}
+        if empty:
+            connection.execute(delete(MonthlyRollup).where(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month.in_(empty),
+            ))
+        if rows:
+            _upsert_rollups(connection, rows)
+
+def rebuild_rollups(connection, user_id=None):
+    """Rebuild the rollup table from the ledgers, for one owner or everyone"""
+    start, end = date(1900, 1, 1), date(9999, 1, 1)
+    totals = ledger_monthly_totals(connection, start, end, user_id)
+    stmt = delete(MonthlyRollup)
+    if user_id is not None:
+        stmt = stmt.where(MonthlyRollup.user_id == user_id)
+    connection.execute(stmt)
+    rows = [
+        {'user_id': owner, 'month': month, 'revenue': revenue, 'expenses': expenses}
+        for (owner, month), (revenue, expenses) in totals.items()
+    ]
+    if rows:
+        connection.execute(insert(MonthlyRollup), rows)
+    return len(rows)
+
+def _history_values(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return set(history.added or ()) | set(history.unchanged or ()) | set(history.deleted or ())
+
+def _is_modified(obj, attrs):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+@event.listens_for(Session, 'before_flush')
+def _collect_rollup_keys(session, flush_context, instances):
+    """Remember which owner-months a pending flush is about to change"""
+    owner_months, owners = set(), set()
+
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Payment):
+            owner_attr, date_attr, watched = 'user_id', 'paid_date', ('amount', 'status', 'paid_date', 'user_id')
+        elif isinstance(obj, Expense):
+            owner_attr, date_attr, watched = 'user_id', 'date', ('amount', 'date', 'user_id')
+        else:
+            if isinstance(obj, Room) and obj in session.deleted:
+                # Cascaded payment deletes are not visible here; rebuild the owner instead
+                owners.add(obj.user_id)
+            continue
+        if obj in session.dirty and not _is_modified(obj, watched):
+            continue
+        for user_id in _history_values(obj, owner_attr):
+            for day in _history_values(obj, date_attr):
+                if user_id is not None and day is not None:
+                    owner_months.add((user_id, month_start(day)))
+
+    if owner_months or owners:
+        pending = session.info.setdefault('rollup_changes', {'months': set(), 'rebuild': set()})
+        pending['months'] |= owner_months
+        pending['rebuild'] |= owners
+
+@event.listens_for(Session, 'after_flush')
+def _apply_rollup_changes(session, flush_context):
+    pending = session.info.pop('rollup_changes', None)
+    if not pending:
+        return
+
+    connection = session.connection()
+    for user_id in pending['rebuild']:
+        rebuild_rollups(connection, user_id)
+    keys = {(user_id, month) for user_id, month in pending['months'] if user_id not in pending['rebuild']}
+    if keys:
+        refresh_rollups(connection, keys)
+
+@click.command('rebuild-rollups')
+@with_appcontext
+@click.option('--user-id', type=int, help='Only rebuild this owner.')
+def rebuild_rollups_command(user_id):
+    """Rebuild the monthly_rollup table from payments and expenses."""
+    count = rebuild_rollups(db.session.connection(), user_id)
+    if user_id is None:
+        run = db.session.get(JobRun, ROLLUP_JOB) or JobRun(name=ROLLUP_JOB)
+        run.last_run_at = datetime.utcnow()
+        run.rows_affected = count
+        db.session.add(run)
+    db.session.commit()
+    click.echo(f'Wrote {count} rollup row(s)')
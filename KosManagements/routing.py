@@ -0,0 +1,34 @@
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+# Views marked read_only answer GET requests from the replica bind when
+# DATABASE_REPLICA_URL is set, so heavy report reads stay off the primary
+# that payment writes go to. The replica may lag the primary slightly.
+
+def read_only(view):
+    """Mark a view whose GET requests only read and may use the replica"""
+    view.read_only = True
+    return view
+
+class RoutingSession(Session):
+    """Sends reads to the replica during read-only requests; a write, and everything after it, uses the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('read_only') and not self.info.get('wrote'):
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            else:
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def init_app(app):
+    @app.before_request
+    def _route_reads():
+        view = app.view_functions.get(request.endpoint)
+        g.read_only = request.method in READ_METHODS and getattr(view, 'read_only', False)
@@ -0,0 +1,186 @@
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import select, func, literal, literal_column, table, column, union_all
+from app import db
+from models import Room, Tenant, Payment, Expense
+
+MAX_TERMS = 8
+PER_PAGE = 20
+
+@dataclass(frozen=True)
+class SearchKind:
+    name: str
+    model: type
+    fields: tuple  # indexed text columns, most important first
+    columns: tuple  # values returned with every hit, including the fields
+
+    @property
+    def table(self):
+        return self.model.__tablename__
+
+KINDS = [
+    SearchKind('tenant', Tenant, ('name', 'phone', 'email'), ('name', 'phone', 'email', 'is_active')),
+    SearchKind('room', Room, ('number', 'description'), ('number', 'description', 'status', 'monthly_rent')),
+    SearchKind('payment', Payment, ('notes',), ('notes', 'amount', 'due_date', 'status')),
+    SearchKind('expense', Expense, ('description', 'notes'), ('description', 'notes', 'amount', 'date', 'category')),
+]
+KINDS_BY_NAME = {kind.name: kind for kind in KINDS}
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    id: int
+    score: float
+    values: dict
+
+class SearchPage:
+    """One page of ranked hits, merged across kinds"""
+
+    def __init__(self, items, page, per_page, has_next):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        return self.page - 1
+
+    @property
+    def next_num(self):
+        return self.page + 1
+
+# Both backends index runs of letters and digits, so "t1@mail.com" and
+# "0812-3456" are found by any of their parts.
+
+def query_terms(text):
+    return re.findall(r'[^\W_]+', text)[:MAX_TERMS]
+
+def _pg_text(field):
+    return f"regexp_replace(coalesce({field}, ''), '[^[:alnum:]]+', ' ', 'g')"
+
+def _pg_document(kind):
+    """The tsvector expression; queries must repeat it exactly for the GIN index to apply"""
+    joined = " || ' ' || ".join(f"coalesce({field}, '')" for field in kind.fields)
+    return f"to_tsvector('simple', regexp_replace({joined}, '[^[:alnum:]]+', ' ', 'g'))"
+
+def _pg_weighted_document(kind):
+    """The document with each field weighted A, B, C.. by importance, for ranking only"""
+    return ' || '.join(f"setweight(to_tsvector('simple', {_pg_text(field)}), '{weight}')"
+                       for field, weight in zip(kind.fields, 'ABCD'))
+
+def _sqlite_statements(kind):
+    fts, fields = f'{kind.table}_fts', ', '.join(kind.fields + ('user_id',))
+    new_values = ', '.join(f'new.{field}' for field in kind.fields + ('user_id',))
+    old_values = ', '.join(f'old.{field}' for field in kind.fields + ('user_id',))
+    insert_new = f'INSERT INTO {fts}(rowid, {fields}) VALUES (new.id, {new_values});'
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {fields}) VALUES ('delete', old.id, {old_values});"
+    return [
+        # External content: the index stores tokens only and reads the values back from the table
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({fields}, "
+        f"content='{kind.table}', content_rowid='id', prefix='2 3 4')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {kind.table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {kind.table} BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {fields} ON {kind.table} '
+        f'BEGIN {delete_old} {insert_new} END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def install(conn):
+    """Create and fill the search indexes; SQLite keeps them current with triggers, Postgres by itself"""
+    for kind in KINDS:
+        if conn.dialect.name == 'sqlite':
+            for statement in _sqlite_statements(kind):
+                conn.exec_driver_sql(statement)
+        else:
+            conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_{kind.table}_search '
+                                 f'ON {kind.table} USING gin (({_pg_document(kind)}))')
+
+def uninstall(conn):
+    for kind in KINDS:
+        if conn.dialect.name == 'sqlite':
+            for action in ('insert', 'delete', 'update'):
+                conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {kind.table}_fts_{action}')
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS {kind.table}_fts')
+        else:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS ix_{kind.table}_search')
+
+_INDEXES = {}
+
+def _index(kind):
+    return _INDEXES.setdefault(kind.name, table(f'{kind.table}_fts', column('rowid')))
+
+def _pg_query(terms):
+    return func.to_tsquery('simple', ' & '.join(terms) + ':*')
+
+def restrict(stmt, kind, user_id, terms):
+    """Limit a select over kind.model to the owner's rows containing every term, the last one as a prefix"""
+    model = kind.model
+    stmt = stmt.where(model.user_id == user_id)
+    if db.session.get_bind().dialect.name == 'sqlite':
+        index = _index(kind)
+        # The owner is an indexed column too, so FTS5 intersects posting lists instead of filtering every match
+        columns = '{' + ' '.join(kind.fields) + '}'
+        match = f'user_id : "{int(user_id)}"' + ''.join(f' AND {columns} : "{term}"' for term in terms) + '*'
+        return stmt.join(index, index.c.rowid == model.id).where(literal_column(index.name).op('MATCH')(match))
+    document = literal_column(_pg_document(kind))
+    return stmt.where(document.op('@@')(_pg_query(terms)))
+
+def rank(kind, terms):
+    """Relevance of a matching row, higher is better, with earlier fields weighing more.
+
+    SQLite uses bm25() over the FTS5 index with the owner column weighted
+    zero; Postgres uses ts_rank() over the same fields weighted A, B, C.
+    Only valid in a statement built by restrict().
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        weights = ', '.join(f'{float(weight)}' for weight in range(len(kind.fields), 0, -1))
+        return literal_column(f'-bm25({kind.table}_fts, {weights}, 0.0)')
+    return func.ts_rank(literal_column(_pg_weighted_document(kind)), _pg_query(terms))
+
+def _ranked(kind, user_id, terms):
+    """(kind, id, score) of every record of one kind matching the terms"""
+    model = kind.model
+    return restrict(select(literal(kind.name).label('kind'), model.id.label('id'), rank(kind, terms).label('score')),
+                    kind, user_id, terms)
+
+def search(user_id, text, kinds=None, page=1, per_page=PER_PAGE):
+    """Rank the owner's records containing every word of `text`, the last one as a prefix.
+
+    Each kind's matches are found and ranked by the full-text index in SQL,
+    merged with UNION ALL and paged with LIMIT/OFFSET, so every match takes
+    part in the ranking however old it is; newer records come first on
+    ties. Only the rows of the requested page are loaded.
+    """
+    terms = [term.lower() for term in query_terms(text)]
+    page = max(page, 1)
+    if not terms:
+        return SearchPage([], page, per_page, False)
+
+    kinds = kinds or KINDS
+    ranked = union_all(*(_ranked(kind, user_id, terms) for kind in kinds)).subquery()
+    rows = db.session.execute(
+        select(ranked.c.kind, ranked.c.id, ranked.c.score)
+        .order_by(ranked.c.score.desc(), ranked.c.id.desc(), ranked.c.kind)
+        .limit(per_page + 1).offset((page - 1) * per_page)
+    ).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    values = {}
+    for kind in kinds:
+        ids = [row.id for row in rows if row.kind == kind.name]
+        if ids:
+            model = kind.model
+            for row in db.session.execute(
+                select(model.id, *(getattr(model, name) for name in kind.columns)).where(model.id.in_(ids))
+            ):
+                row_values = row._asdict()
+                values[kind.name, row_values.pop('id')] = row_values
+    hits = [SearchHit(row.kind, row.id, float(row.score), values[row.kind, row.id]) for row in rows]
+    return SearchPage(hits, page, per_page, has_next)
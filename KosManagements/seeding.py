@@ -0,0 +1,192 @@
+import random
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import select, insert
+from werkzeug.security import generate_password_hash
+from flask.cli import with_appcontext
+from app import db
+from models import User, Room, Tenant, Payment, Expense
+from reports import month_start, add_months, iter_months, rebuild_rollups, rollups_ready
+from cache import owner_cache
+from versions import bump_versions, GLOBAL
+
+INSERT_CHUNK = 5000
+EXPENSE_CATEGORIES = ['utilities', 'maintenance', 'supplies', 'repairs', 'insurance', 'other']
+FIRST_NAMES = ['Adi', 'Budi', 'Citra', 'Dewi', 'Eka', 'Fajar', 'Gita', 'Hadi', 'Indah', 'Joko', 'Kartika', 'Lestari',
+               'Made', 'Nanda', 'Oki', 'Putri', 'Rina', 'Sari', 'Tono', 'Wulan', 'Yusuf', 'Zahra']
+LAST_NAMES = ['Pratama', 'Saputra', 'Wijaya', 'Santoso', 'Hidayat', 'Kusuma', 'Nugroho', 'Lestari', 'Gunawan', 'Siregar']
+
+def _insert(table, rows, returning=None):
+    """Executemany insert in chunks; with `returning`, the generated values in input order"""
+    generated = []
+    for i in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[i:i + INSERT_CHUNK]
+        if returning is None:
+            db.session.execute(insert(table), chunk)
+        else:
+            stmt = insert(table).returning(*returning, sort_by_parameter_order=True)
+            generated.extend(db.session.execute(stmt, chunk).all())
+    return generated
+
+def _tenancies(rng, start, today, count, occupied):
+    """Split [start, today] into `count` back-to-back tenancies; the last stays open if occupied"""
+    span = (today - start).days
+    cuts = sorted(rng.randint(1, span - 1) for _ in range(count - 1)) if span > count else []
+    bounds = [start] + [start + timedelta(days=cut) for cut in cuts] + [today]
+    periods = []
+    for i, (begin, end) in enumerate(zip(bounds, bounds[1:])):
+        last = i == len(bounds) - 2
+        periods.append((begin, None if last and occupied else end - timedelta(days=1)))
+    return periods
+
+def _payment_rows(rng, tenant, today, late_rate):
+    start, end = tenant['start_date'], tenant['end_date'] or today
+    rows = []
+    for period in iter_months(month_start(start), add_months(month_start(end), 1)):
+        due = period + timedelta(days=4)
+        if due > today + timedelta(days=31):
+            break
+        if due >= today:
+            status, paid = 'pending', None
+        elif rng.random() < late_rate and due > today - timedelta(days=90):
+            status, paid = 'overdue', None
+        else:
+            status, paid = 'paid', due + timedelta(days=rng.randint(-3, 10))
+        rows.append({
+            'amount': tenant['rent'],
+            'due_date': due,
+            'paid_date': paid,
+            'status': status,
+            'notes': f'Rent {period:%B %Y}',
+            'billing_period': period,
+            'created_at': datetime.combine(period, datetime.min.time()),
+            'room_id': tenant['room_id'],
+            'tenant_id': tenant['id'],
+            'user_id': tenant['user_id'],
+        })
+    return rows
+
+def seed_portfolio(owners=5, rooms=20, tenants=3, years=3, expenses=8, occupancy=0.85, late_rate=0.05,
+                   prefix='owner', password='password', seed=0, today=None):
+    """Insert a synthetic portfolio and return a dict of row counts.
+
+    Every owner gets `rooms` rooms; each room has had `tenants` successive
+    tenants over the last `years` years, the latest still living there for
+    roughly `occupancy` of the rooms. Tenants have a monthly payment for
+    every month of their stay and owners `expenses` expenses a month. The
+    same arguments always produce the same data.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    start = add_months(month_start(today), -12 * years)
+    password_hash = generate_password_hash(password)
+    now = datetime.utcnow()
+    counts = dict.fromkeys(['owners', 'rooms', 'tenants', 'payments', 'expenses'], 0)
+
+    usernames = [f'{prefix}{i}' for i in range(1, owners + 1)]
+    taken = set(db.session.scalars(select(User.username).where(User.username.in_(usernames))))
+    if taken:
+        raise ValueError(f'Users already exist: {", ".join(sorted(taken))}')
+
+    for username in usernames:
+        (user_id,), = _insert(User.__table__, [{
+            'username': username,
+            'email': f'{username}@example.com',
+            'password_hash': password_hash,
+            'created_at': now,
+        }], returning=[User.id])
+
+        occupied = [rng.random() < occupancy for _ in range(rooms)]
+        room_rows = [{
+            'number': f'{1 + i // 50}{i % 50 + 1:02d}',  # floor, then room on that floor
+            'description': rng.choice(['Single room', 'Double room', 'Room with ensuite', 'Corner room', None]),
+            'monthly_rent': float(rng.randrange(500, 3000, 50)),
+            'status': 'occupied' if occupied[i] else 'available',
+            'created_at': now,
+            'user_id': user_id,
+        } for i in range(rooms)]
+        room_ids = [row.id for row in _insert(Room.__table__, room_rows, returning=[Room.id])]
+
+        tenant_rows = []
+        for room_id, is_occupied in zip(room_ids, occupied):
+            for begin, end in _tenancies(rng, start, today, tenants, is_occupied):
+                name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+                tenant_rows.append({
+                    'name': name,
+                    'phone': f'08{rng.randrange(10**9, 10**10)}',
+                    'email': f'{name.lower().replace(" ", ".")}{rng.randrange(1000)}@example.com',
+                    'start_date': begin,
+                    'end_date': end,
+                    'is_active': end is None,
+                    'created_at': now,
+                    'room_id': room_id,
+                    'user_id': user_id,
+                })
+        tenant_ids = [row.id for row in _insert(Tenant.__table__, tenant_rows, returning=[Tenant.id])]
+
+        payment_rows = []
+        rents = {room_id: room['monthly_rent'] for room_id, room in zip(room_ids, room_rows)}
+        for tenant_id, tenant in zip(tenant_ids, tenant_rows):
+            payment_rows.extend(_payment_rows(rng, {
+                'id': tenant_id,
+                'room_id': tenant['room_id'],
+                'user_id': user_id,
+                'start_date': tenant['start_date'],
+                'end_date': tenant['end_date'],
+                'rent': rents[tenant['room_id']],
+            }, today, late_rate))
+        _insert(Payment.__table__, payment_rows)
+
+        expense_rows = []
+        for month in iter_months(start, add_months(month_start(today), 1)):
+            for _ in range(expenses):
+                day = month + timedelta(days=rng.randrange(28))
+                if day > today:
+                    continue
+                category = rng.choice(EXPENSE_CATEGORIES)
+                expense_rows.append({
+                    'description': f'{category.title()} {month:%b %Y}',
+                    'amount': round(rng.uniform(10, 800), 2),
+                    'category': category,
+                    'date': day,
+                    'notes': None,
+                    'created_at': now,
+                    'user_id': user_id,
+                })
+        _insert(Expense.__table__, expense_rows)
+
+        bump_versions(db.session.connection(), [user_id])
+        db.session.commit()
+        counts['owners'] += 1
+        counts['rooms'] += len(room_rows)
+        counts['tenants'] += len(tenant_rows)
+        counts['payments'] += len(payment_rows)
+        counts['expenses'] += len(expense_rows)
+
+    if rollups_ready():
+        rebuild_rollups(db.session.connection())
+    bump_versions(db.session.connection(), [GLOBAL])
+    db.session.commit()
+    owner_cache.bump_all()
+    return counts
+
+@click.command('seed-data')
+@with_appcontext
+@click.option('--owners', default=5, show_default=True, help='Number of owner accounts to create.')
+@click.option('--rooms', default=20, show_default=True, help='Rooms per owner.')
+@click.option('--tenants', default=3, show_default=True, help='Successive tenants per room.')
+@click.option('--years', default=3, show_default=True, help='Years of payment and expense history.')
+@click.option('--expenses', default=8, show_default=True, help='Expenses per owner per month.')
+@click.option('--occupancy', default=0.85, show_default=True, help='Share of rooms with a current tenant.')
+@click.option('--prefix', default='owner', show_default=True, help='Username prefix for the owners.')
+@click.option('--password', default='password', show_default=True, help='Password for every owner.')
+@click.option('--seed', default=0, show_default=True, help='Random seed; the same seed gives the same data.')
+def seed_data_command(owners, rooms, tenants, years, expenses, occupancy, prefix, password, seed):
+    """Fill the database with a synthetic portfolio for benchmarking."""
+    try:
+        counts = seed_portfolio(owners, rooms, tenants, years, expenses, occupancy,
+                                prefix=prefix, password=password, seed=seed)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    click.echo(', '.join(f'{count} {name}' for name, count in counts.items()))
@@ -47,7 +47,7 @@ function initializeRevenueChart() {
     showChartLoading(chartContainer);
     
     // Fetch revenue data from API
-    fetch('/api/dashboard/revenue-data')
+    fetch('/api/dashboard/revenue-data', { cache: 'no-cache' })
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
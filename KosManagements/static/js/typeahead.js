@@ -0,0 +1,58 @@
+/**
+ * Typeahead for select boxes with a data-typeahead URL: a search box above
+ * the select fetches matching options from the server as the user types.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-typeahead]').forEach(initializeTypeahead);
+});
+
+/**
+ * Add a search box in front of one select
+ */
+function initializeTypeahead(select) {
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control form-control-sm mb-1';
+    input.placeholder = 'Type to search...';
+    input.setAttribute('aria-label', 'Search ' + (select.labels[0] ? select.labels[0].textContent.trim() : 'options'));
+    select.parentNode.insertBefore(input, select);
+
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            const url = select.dataset.typeahead + '?q=' + encodeURIComponent(input.value.trim());
+            fetch(url, { signal: controller.signal, headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(data => replaceOptions(select, data.results))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Typeahead request failed:', error);
+                    }
+                });
+        }, 200);
+    });
+}
+
+/**
+ * Show the fetched options, keeping the current selection first
+ */
+function replaceOptions(select, results) {
+    const selected = select.selectedOptions[0];
+    select.innerHTML = '';
+    if (selected) {
+        select.appendChild(selected);
+    }
+    results.forEach(function(result) {
+        if (!selected || String(result.id) !== selected.value) {
+            select.appendChild(new Option(result.label, result.id));
+        }
+    });
+}
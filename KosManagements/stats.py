@@ -0,0 +1,110 @@
+from dataclasses import dataclass, asdict
+from datetime import date
+from sqlalchemy import select, func, case, true
+from app import db
+from models import Room, Tenant, Payment
+from utils import calculate_occupancy_rate
+
+@dataclass(frozen=True)
+class DashboardStats:
+    total_rooms: int
+    occupied_rooms: int
+    total_tenants: int
+    monthly_revenue: float
+    pending_payments: int
+    overdue_payments: int
+
+    @property
+    def available_rooms(self):
+        return self.total_rooms - self.occupied_rooms
+
+    @property
+    def occupancy_rate(self):
+        return calculate_occupancy_rate(self.total_rooms, self.occupied_rooms)
+
+    def to_dict(self):
+        data = asdict(self)
+        data['available_rooms'] = self.available_rooms
+        data['occupancy_rate'] = self.occupancy_rate
+        return data
+
+@dataclass(frozen=True)
+class PaymentSummary:
+    tenant_name: str
+    room_number: str
+    amount: float
+    due_date: date
+    status: str
+
+@dataclass(frozen=True)
+class RoomSummary:
+    id: int
+    number: str
+    monthly_rent: float
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def get_dashboard_stats(user_id, today=None):
+    """Compute every dashboard headline number for one owner in a single query"""
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    is_overdue = (Payment.status == 'overdue') | ((Payment.status == 'pending') & (Payment.due_date < today))
+
+    rooms = select(
+        func.count(Room.id).label('total'),
+        _count_if(Room.status == 'occupied').label('occupied'),
+    ).where(Room.user_id == user_id).subquery()
+
+    tenants = select(
+        func.count(Tenant.id).label('active'),
+    ).where(Tenant.user_id == user_id, Tenant.is_active == True).subquery()
+
+    payments = select(
+        func.coalesce(func.sum(case(
+            ((Payment.status == 'paid') & (Payment.paid_date >= month_start), Payment.amount),
+            else_=0,
+        )), 0).label('monthly_revenue'),
+        _count_if((Payment.status == 'pending') & (Payment.due_date >= today)).label('pending'),
+        _count_if(is_overdue).label('overdue'),
+    ).where(Payment.user_id == user_id).subquery()
+
+    row = db.session.execute(
+        select(rooms, tenants, payments)
+        .select_from(rooms.join(tenants, true()).join(payments, true()))
+    ).one()
+
+    return DashboardStats(
+        total_rooms=row.total,
+        occupied_rooms=row.occupied,
+        total_tenants=row.active,
+        monthly_revenue=float(row.monthly_revenue),
+        pending_payments=row.pending,
+        overdue_payments=row.overdue,
+    )
+
+def get_recent_payments(user_id, limit=5):
+    """Latest payments as plain summaries, fetched in one joined query"""
+    rows = db.session.execute(
+        select(Tenant.name, Room.number, Payment.amount, Payment.due_date, Payment.status)
+        .select_from(Payment)
+        .join(Tenant, Payment.tenant_id == Tenant.id)
+        .join(Room, Payment.room_id == Room.id)
+        .where(Payment.user_id == user_id)
+        .order_by(Payment.created_at.desc())
+        .limit(limit)
+    ).all()
+    return [PaymentSummary(*row) for row in rows]
+
+def get_popular_rooms(user_id, limit=3):
+    """Rooms ranked by total paid revenue as (room, revenue) pairs"""
+    revenue = func.sum(Payment.amount)
+    rows = db.session.execute(
+        select(Room.id, Room.number, Room.monthly_rent, revenue.label('total_revenue'))
+        .join(Payment)
+        .where(Payment.user_id == user_id, Payment.status == 'paid')
+        .group_by(Room.id, Room.number, Room.monthly_rent)
+        .order_by(revenue.desc())
+        .limit(limit)
+    ).all()
+    return [(RoomSummary(row.id, row.number, row.monthly_rent), float(row.total_revenue)) for row in rows]
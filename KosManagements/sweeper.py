@@ -0,0 +1,74 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from app import db
+from models import JobRun
+from utils import update_payment_status
+from cache import owner_cache
+from versions import bump_versions, GLOBAL
+from metrics import track_job
+
+SWEEP_JOB = 'overdue_sweep'
+DEFAULT_INTERVAL = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+def last_sweep():
+    """Return the JobRun row for the last overdue sweep, if any"""
+    return db.session.get(JobRun, SWEEP_JOB)
+
+@track_job('overdue_sweep')
+def run_overdue_sweep():
+    """Flag overdue payments for all owners and record when the sweep ran"""
+    updated = update_payment_status()
+    run = last_sweep() or JobRun(name=SWEEP_JOB)
+    run.last_run_at = datetime.utcnow()
+    run.rows_affected = updated
+    db.session.add(run)
+    if updated:
+        bump_versions(db.session.connection(), [GLOBAL])
+    db.session.commit()
+    if updated:
+        owner_cache.bump_all()
+    logger.info('Overdue sweep marked %d payment(s) overdue', updated)
+    return updated
+
+def sweep_if_due(interval=DEFAULT_INTERVAL):
+    """Run the sweep unless another worker already ran it within the interval"""
+    run = last_sweep()
+    if run and run.last_run_at > datetime.utcnow() - timedelta(seconds=interval):
+        return None
+    return run_overdue_sweep()
+
+def start_scheduler(flask_app, interval=DEFAULT_INTERVAL):
+    """Start a daemon thread that sweeps overdue payments every interval seconds"""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            with flask_app.app_context():
+                try:
+                    sweep_if_due(interval)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Overdue sweep failed')
+            stop.wait(min(interval, 60 * 60))
+
+    thread = threading.Thread(target=loop, name='overdue-sweeper', daemon=True)
+    thread.start()
+    return stop
+
+@click.command('sweep-overdue')
+@with_appcontext
+@click.option('--force', is_flag=True, help='Run even if a sweep ran within the interval.')
+@click.option('--interval', default=DEFAULT_INTERVAL, show_default=True, help='Minimum seconds between sweeps.')
+def sweep_overdue_command(force, interval):
+    """Mark pending payments past their due date as overdue."""
+    updated = run_overdue_sweep() if force else sweep_if_due(interval)
+    if updated is None:
+        click.echo(f'Skipped: last sweep ran at {last_sweep().last_run_at:%Y-%m-%d %H:%M:%S} UTC')
+    else:
+        click.echo(f'Marked {updated} payment(s) overdue')
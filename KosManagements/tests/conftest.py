@@ -0,0 +1,41 @@
+import pytest
+from app import create_app, db
+from models import User
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+def _user(name):
+    user = User(username=name, email=f"{name}@example.com")
+    user.set_password("secret1")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+@pytest.fixture
+def owner(app):
+    return _user("owner")
+
+@pytest.fixture
+def stranger(app, owner):
+    """A second owner, whose records the first must never see"""
+    return _user("stranger")
+
+@pytest.fixture
+def client(app, owner):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(owner)
+        session["_fresh"] = True
+    return client
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import blueprints.api
+from sqlalchemy import insert
+from app import db
+from models import Room, Tenant, Payment
+from versions import bump_versions
+
+def add_paid_payment(owner, amount, orm=True):
+    room = db.session.query(Room).filter_by(user_id=owner).first()
+    if room is None:
+        room = Room(number='101', monthly_rent=100, status='occupied', user_id=owner)
+        db.session.add(room)
+        db.session.flush()
+        db.session.add(Tenant(name='T', start_date=date(2024, 1, 1), room_id=room.id, user_id=owner))
+        db.session.commit()
+    tenant_id = room.tenants[0].id
+    values = dict(amount=amount, due_date=date.today(), paid_date=date.today(), status='paid',
+                  room_id=room.id, tenant_id=tenant_id, user_id=owner)
+    if orm:
+        db.session.add(Payment(**values))
+    else:
+        # As another worker would: the durable version moves, this process's cache versions do not
+        db.session.execute(insert(Payment).values(**values))
+        bump_versions(db.session.connection(), [owner])
+    db.session.commit()
+
+def current_revenue(response):
+    return response.json[-1]['revenue']
+
+def test_revenue_body_follows_durable_version(client, owner):
+    add_paid_payment(owner, 100)
+    first = client.get('/api/dashboard/revenue-data')
+    assert current_revenue(first) == 100
+
+    add_paid_payment(owner, 50, orm=False)
+    second = client.get('/api/dashboard/revenue-data', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert current_revenue(second) == 150
+
+    third = client.get('/api/dashboard/revenue-data', headers={'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 304
+
+def test_revenue_etag_changes_with_the_month(client, owner, monkeypatch):
+    first = client.get('/api/dashboard/revenue-data')
+
+    class NextMonth(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=32)
+
+    monkeypatch.setattr(blueprints.api, 'date', NextMonth)
+    response = client.get('/api/dashboard/revenue-data', headers={
+        'If-None-Match': first.headers['ETag'],
+        'If-Modified-Since': first.headers['Last-Modified'],
+    })
+    assert response.status_code == 200
+    assert response.headers['ETag'] != first.headers['ETag']
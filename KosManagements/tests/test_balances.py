@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import pytest
+from app import db
+from models import Room, Tenant, Payment
+from balances import get_tenant_balances, get_owner_aging, load_tenant_balances, TenantBalance
+
+TODAY = date(2024, 6, 30)
+
+@pytest.fixture
+def tenants(app, owner):
+    room = Room(number='101', monthly_rent=100, status='occupied', user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    late, clear = (Tenant(name=name, start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+                   for name in ('Late', 'Clear'))
+    db.session.add_all([late, clear])
+    db.session.flush()
+    # Distinct powers of two, so each bucket's sum names the rows that landed in it
+    for days_late, status, amount in [(-5, 'pending', 1), (0, 'pending', 2), (1, 'overdue', 4), (30, 'pending', 8),
+                                      (31, 'overdue', 16), (60, 'overdue', 32), (61, 'overdue', 64),
+                                      (90, 'overdue', 128), (91, 'overdue', 256), (100, 'paid', 512)]:
+        due_date = TODAY - timedelta(days=days_late)
+        db.session.add(Payment(amount=amount, due_date=due_date, status=status,
+                               paid_date=due_date if status == 'paid' else None,
+                               room_id=room.id, tenant_id=late.id, user_id=owner))
+    db.session.commit()
+    return late, clear
+
+def test_aging_buckets_split_on_days_past_due(tenants):
+    late, clear = tenants
+    balances = get_tenant_balances([late.id, clear.id], today=TODAY)
+
+    assert balances[late.id] == TenantBalance(
+        paid=512.0, pending=3.0, overdue=508.0,
+        aging={'0-30': 12.0, '31-60': 48.0, '61-90': 192.0, '90+': 256.0},
+    )
+    assert balances[late.id].outstanding == 511.0
+    assert balances[clear.id] == TenantBalance()
+
+def test_owner_aging_matches_the_tenant_totals(tenants, owner):
+    late, _ = tenants
+
+    assert get_owner_aging(owner, today=TODAY) == get_tenant_balances([late.id], today=TODAY)[late.id]
+
+def test_balances_are_attached_to_a_page_of_tenants(tenants):
+    late, clear = tenants
+    load_tenant_balances([late, clear], today=TODAY)
+
+    assert (late.total_paid, late.outstanding_amount) == (512.0, 511.0)
+    assert (clear.total_paid, clear.outstanding_amount) == (0.0, 0.0)
@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+from app import db
+from models import Room, Tenant, Payment, LazyQueryError
+
+@pytest.fixture
+def portfolio(app, owner):
+    app.config['STRICT_BATCH_LOADING'] = True
+    for n in range(4):
+        room = Room(number=f'10{n}', monthly_rent=300, status='occupied', user_id=owner)
+        db.session.add(room)
+        db.session.flush()
+        tenant = Tenant(name=f'Tenant {n}', start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+        db.session.add(tenant)
+        db.session.flush()
+        db.session.add_all([
+            Payment(amount=300, due_date=date(2024, 1, 1), paid_date=date(2024, 1, 2), status='paid',
+                    room_id=room.id, tenant_id=tenant.id, user_id=owner),
+            Payment(amount=300, due_date=date(2024, 2, 1), status='pending',
+                    room_id=room.id, tenant_id=tenant.id, user_id=owner),
+        ])
+    db.session.commit()
+
+@pytest.mark.parametrize('path', ['/rooms', '/tenants'])
+def test_listings_render_with_strict_batch_loading(client, portfolio, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert b'Tenant 3' in response.data
+
+@pytest.mark.parametrize('path, loader', [
+    ('/rooms', 'blueprints.rooms.load_room_aggregates'),
+    ('/tenants', 'blueprints.tenants.load_tenant_balances'),
+])
+def test_strict_mode_fails_when_the_batch_loader_is_bypassed(client, portfolio, monkeypatch, path, loader):
+    monkeypatch.setattr(loader, lambda *args, **kwargs: None)
+    with pytest.raises(LazyQueryError):
+        client.get(path)
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+from app import db
+from models import JobRun
+from reports import ROLLUP_JOB, rebuild_rollups
+from seeding import seed_portfolio
+from bench import ROUTES, busiest_owner, run_benchmark
+
+@pytest.fixture
+def portfolio(app):
+    seed_portfolio(owners=2, rooms=12, tenants=2, years=1, expenses=3)
+
+@pytest.mark.parametrize('rollups', [False, True])
+def test_every_route_stays_within_its_query_budget(portfolio, rollups):
+    if rollups:
+        rebuild_rollups(db.session.connection())
+        db.session.add(JobRun(name=ROLLUP_JOB, last_run_at=datetime.utcnow()))
+        db.session.commit()
+
+    results = run_benchmark(busiest_owner(), iterations=2, warmup=1, cold=True)
+
+    assert [result.endpoint for result in results] == [endpoint for endpoint, _, _ in ROUTES]
+    assert {result.endpoint: result.failures for result in results} == {endpoint: [] for endpoint, _, _ in ROUTES}
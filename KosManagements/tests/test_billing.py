@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select, func
+from app import db
+from models import Room, Tenant, Payment
+from billing import generate_invoices, prorated_amount
+
+PERIOD = date(2024, 3, 1)
+
+@pytest.fixture
+def tenants(app, owner, stranger):
+    rooms = {}
+    for name, user_id, start, end in [
+        ('Whole', owner, date(2024, 1, 1), None),
+        ('In', owner, date(2024, 3, 10), None),
+        ('Out', owner, date(2023, 6, 1), date(2024, 3, 15)),
+        ('Left', owner, date(2023, 6, 1), date(2024, 2, 29)),
+        ('Other', stranger, date(2024, 1, 1), None),
+    ]:
+        room = Room(number=name, monthly_rent=310, user_id=user_id)
+        db.session.add(room)
+        db.session.flush()
+        db.session.add(Tenant(name=name, start_date=start, end_date=end, room_id=room.id, user_id=user_id))
+        rooms[name] = room
+    db.session.commit()
+    return rooms
+
+def _invoices():
+    return dict(db.session.execute(
+        select(Tenant.name, Payment.amount).join(Tenant, Payment.tenant_id == Tenant.id)
+        .where(Payment.billing_period == PERIOD)
+    ).all())
+
+def test_prorated_amount_covers_only_occupied_days():
+    assert prorated_amount(310, date(2024, 3, 10), None, PERIOD) == 220.0
+    assert prorated_amount(310, date(2023, 1, 1), date(2024, 3, 15), PERIOD) == 150.0
+    assert prorated_amount(300, date(2024, 2, 12), None, date(2024, 2, 1)) == 186.21
+    assert prorated_amount(310, date(2024, 4, 1), None, PERIOD) == 0.0
+
+def test_move_in_and_move_out_months_are_prorated(owner, tenants):
+    assert generate_invoices(PERIOD, owner) == 3
+    assert _invoices() == {'Whole': 310.0, 'In': 220.0, 'Out': 150.0}
+    due = dict(db.session.execute(select(Tenant.name, Payment.due_date).join(Tenant, Payment.tenant_id == Tenant.id)).all())
+    assert due['In'] == date(2024, 3, 10)
+
+def test_rerunning_billing_creates_no_duplicates(owner, tenants):
+    assert generate_invoices(PERIOD, owner) == 3
+    assert generate_invoices(PERIOD, owner) == 0
+    assert generate_invoices(PERIOD) == 1  # only the other owner's tenant is still unbilled
+    assert generate_invoices(PERIOD) == 0
+    assert db.session.scalar(select(func.count()).select_from(Payment)) == 4
+
+def test_generate_route_flashes_a_bad_period(client, tenants):
+    response = client.post('/payments/generate', data={'period': '2024-13'})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert session['_flashes'] == [('danger', "Invalid billing period '2024-13', expected YYYY-MM")]
+    assert db.session.scalar(select(func.count()).select_from(Payment)) == 0
+
+def test_generate_route_bills_the_owner(client, tenants):
+    client.post('/payments/generate', data={'period': '2024-03'})
+    with client.session_transaction() as session:
+        assert session['_flashes'] == [('success', 'Generated 3 invoice(s) for March 2024.')]
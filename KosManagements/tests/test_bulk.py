@@ -0,0 +1,69 @@
+from datetime import date, datetime
+
+from sqlalchemy import select, func
+from app import db
+from models import Room, Tenant, Payment, JobRun, MonthlyRollup
+from reports import ROLLUP_JOB
+
+def _room(user_id, number, rent=300, status='available'):
+    room = Room(number=number, monthly_rent=rent, status=status, user_id=user_id)
+    db.session.add(room)
+    db.session.flush()
+    return room
+
+def _tenant(room, name):
+    tenant = Tenant(name=name, start_date=date(2024, 1, 1), room_id=room.id, user_id=room.user_id)
+    db.session.add(tenant)
+    db.session.flush()
+    return tenant
+
+def _rents():
+    return dict(db.session.execute(select(Room.number, Room.monthly_rent)).all())
+
+def test_bulk_rent_change_only_touches_the_owners_rooms(client, owner, stranger):
+    ids = [_room(owner, '101', 300).id, _room(owner, '102', 250).id, _room(stranger, '201', 300).id]
+    _room(owner, '103', 400)
+    db.session.commit()
+
+    client.post('/rooms/rent', data={'ids': ids, 'percent': '10'})
+    assert _rents() == {'101': 330.0, '102': 275.0, '201': 300.0, '103': 400.0}
+    client.post('/rooms/rent', data={'ids': ids[:1], 'monthly_rent': '500'})
+    assert _rents()['101'] == 500.0
+
+def test_bulk_rent_change_rejects_ambiguous_input(client, owner):
+    room_id = _room(owner, '101').id
+    db.session.commit()
+    client.post('/rooms/rent', data={'ids': [room_id], 'percent': '10', 'monthly_rent': '500'})
+    with client.session_transaction() as session:
+        assert session['_flashes'] == [('danger', 'Give either a new rent or a percentage change')]
+    assert _rents() == {'101': 300.0}
+
+def test_bulk_deactivate_frees_only_rooms_left_empty(client, owner, stranger):
+    shared, single, theirs = _room(owner, '101', status='occupied'), _room(owner, '102', status='occupied'), \
+        _room(stranger, '201', status='occupied')
+    leaving, alone, other = _tenant(shared, 'A'), _tenant(single, 'C'), _tenant(theirs, 'D')
+    _tenant(shared, 'B')
+    db.session.commit()
+
+    client.post('/tenants/deactivate', data={'ids': [leaving.id, alone.id, other.id]})
+    active = dict(db.session.execute(select(Tenant.name, Tenant.is_active)).all())
+    assert active == {'A': False, 'B': True, 'C': False, 'D': True}
+    assert db.session.scalar(select(Tenant.end_date).where(Tenant.name == 'A')) == date.today()
+    status = dict(db.session.execute(select(Room.number, Room.status)).all())
+    assert status == {'101': 'occupied', '102': 'available', '201': 'occupied'}
+
+def test_deleting_a_room_cascades_and_rebuilds_rollups(client, owner):
+    db.session.add(JobRun(name=ROLLUP_JOB, last_run_at=datetime.utcnow()))
+    kept, deleted = _room(owner, '101'), _room(owner, '102')
+    for room in (kept, deleted):
+        tenant = _tenant(room, room.number)
+        db.session.add(Payment(amount=room.monthly_rent, due_date=date(2024, 3, 1), paid_date=date(2024, 3, 2),
+                               status='paid', room_id=room.id, tenant_id=tenant.id, user_id=owner))
+    db.session.commit()
+    assert db.session.scalar(select(MonthlyRollup.revenue)) == 600.0
+
+    assert client.post(f'/rooms/{deleted.id}/delete').status_code == 302
+    db.session.expire_all()
+    assert db.session.scalars(select(Tenant.name)).all() == ['101']
+    assert db.session.scalar(select(func.count()).select_from(Payment)) == 1
+    assert db.session.execute(select(MonthlyRollup.month, MonthlyRollup.revenue)).all() == [(date(2024, 3, 1), 300.0)]
@@ -0,0 +1,14 @@
+from sqlalchemy import insert
+from app import db
+from models import Room
+from versions import bump_versions
+
+def test_write_from_another_worker_invalidates_cached_stats(client, owner):
+    assert client.get('/api/dashboard/stats').json['total_rooms'] == 0
+
+    # Another worker's write: the durable version moves, this process's cache versions do not
+    db.session.execute(insert(Room).values(number='101', monthly_rent=100, status='available', user_id=owner))
+    bump_versions(db.session.connection(), [owner])
+    db.session.commit()
+
+    assert client.get('/api/dashboard/stats').json['total_rooms'] == 1
@@ -0,0 +1,68 @@
+import csv
+import gzip
+import io
+from datetime import date
+
+import pytest
+import exports
+from sqlalchemy import select
+from app import db
+from models import Room, Tenant, Payment, Expense
+
+@pytest.fixture
+def records(app, owner, stranger):
+    for user_id, prefix in ((owner, ''), (stranger, 'x')):
+        room = Room(number=f'{prefix}101', monthly_rent=100, status='occupied', user_id=user_id)
+        db.session.add(room)
+        db.session.flush()
+        tenant = Tenant(name=f'{prefix}Ann', phone='0812', start_date=date(2024, 1, 1), room_id=room.id,
+                        user_id=user_id)
+        gone = Tenant(name=f'{prefix}Bob', start_date=date(2023, 1, 1), end_date=date(2023, 12, 31),
+                      is_active=False, room_id=room.id, user_id=user_id)
+        db.session.add_all([tenant, gone])
+        db.session.flush()
+        for month, status in [(1, 'paid'), (2, 'paid'), (3, 'overdue'), (4, 'pending'), (5, 'pending')]:
+            db.session.add(Payment(amount=100 + month, due_date=date(2024, month, 5), status=status,
+                                   paid_date=date(2024, month, 5) if status == 'paid' else None,
+                                   notes=f'Rent, month {month}', billing_period=date(2024, month, 1),
+                                   room_id=room.id, tenant_id=tenant.id, user_id=user_id))
+        db.session.add(Expense(description='Fix "tap"', amount=12.5, category='repairs', date=date(2024, 2, 1),
+                               user_id=user_id))
+    db.session.commit()
+
+def _rows(response):
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+def test_payment_export_streams_the_owners_rows_newest_first(records, client, monkeypatch):
+    monkeypatch.setattr(exports, 'BATCH_SIZE', 2)  # several batches for five rows
+    response = client.get('/export/payments.csv')
+
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="payments.csv"'
+    rows = _rows(response)
+    assert rows[0] == exports.PAYMENT_COLUMNS
+    assert [row[1] for row in rows[1:]] == [f'2024-0{month}-05' for month in (5, 4, 3, 2, 1)]
+    assert rows[-1][2:] == ['2024-01-05', 'paid', '101.0', 'Ann', '101', '2024-01-01', 'Rent, month 1']
+
+def test_payment_export_follows_the_status_filter(records, client):
+    rows = _rows(client.get('/export/payments.csv?status=pending'))
+
+    assert [(row[3], row[1]) for row in rows[1:]] == [('pending', '2024-05-05'), ('pending', '2024-04-05')]
+
+def test_gzip_export_decompresses_to_the_plain_csv(records, client):
+    plain = client.get('/export/payments.csv').get_data()
+    response = client.get('/export/payments.csv?gzip=1')
+
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="payments.csv.gz"'
+    assert gzip.decompress(response.get_data()) == plain
+
+def test_expense_and_tenant_exports(records, client, owner):
+    expense_id = db.session.scalar(select(Expense.id).where(Expense.user_id == owner))
+    assert _rows(client.get('/export/expenses.csv')) == [
+        exports.EXPENSE_COLUMNS, [str(expense_id), '2024-02-01', 'repairs', 'Fix "tap"', '12.5', ''],
+    ]
+    tenants = _rows(client.get('/export/tenants.csv'))
+    assert [row[1] for row in tenants[1:]] == ['Ann', 'Bob']
+    active = _rows(client.get('/export/tenants.csv?active_only=1'))
+    assert [row[1:] for row in active[1:]] == [['Ann', '0812', '', '101', '2024-01-01', '', 'True']]
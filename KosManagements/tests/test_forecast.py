@@ -0,0 +1,40 @@
+from datetime import date
+
+from app import db
+from models import Room, Tenant, Payment
+from billing import prorated_amount
+from forecast import _rent_roll, cash_flow_forecast
+
+FIRST = date(2024, 3, 1)
+
+def test_rent_roll_prorates_only_move_in_and_move_out_months(app, owner):
+    rooms = [Room(number=str(n), monthly_rent=310, user_id=owner) for n in range(4)]
+    db.session.add_all(rooms)
+    db.session.flush()
+    whole = Tenant(name='Whole', start_date=date(2023, 1, 1), room_id=rooms[0].id, user_id=owner)
+    moving_in = Tenant(name='In', start_date=date(2024, 4, 10), room_id=rooms[1].id, user_id=owner)
+    moving_out = Tenant(name='Out', start_date=date(2024, 1, 1), end_date=date(2024, 3, 20),
+                        room_id=rooms[2].id, user_id=owner)
+    gone = Tenant(name='Gone', start_date=date(2023, 1, 1), room_id=rooms[3].id, user_id=owner, is_active=False)
+    db.session.add_all([whole, moving_in, moving_out, gone])
+    db.session.flush()
+    # Invoiced months come off the rent roll: a whole one and a prorated one
+    db.session.add_all([
+        Payment(amount=310, due_date=FIRST, billing_period=FIRST, room_id=rooms[0].id, tenant_id=whole.id, user_id=owner),
+        Payment(amount=200, due_date=FIRST, billing_period=FIRST, room_id=rooms[2].id, tenant_id=moving_out.id,
+                user_id=owner),
+    ])
+    db.session.commit()
+
+    move_in = prorated_amount(310, date(2024, 4, 10), None, date(2024, 4, 1))
+    assert _rent_roll(owner, FIRST, 3) == [0.0, 310 + move_in, 620.0]
+
+def test_forecast_bills_the_rent_roll(app, owner):
+    room = Room(number='1', monthly_rent=300, user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    db.session.add(Tenant(name='Ann', start_date=date(2024, 1, 15), room_id=room.id, user_id=owner))
+    db.session.commit()
+
+    forecast = cash_flow_forecast(owner, 2, today=date(2024, 2, 10))
+    assert [month.billed for month in forecast.months] == [300.0, 300.0]
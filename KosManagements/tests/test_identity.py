@@ -0,0 +1,45 @@
+import contextvars
+
+import pytest
+from app import db
+from models import User
+from identity import identities, Identity
+from cache import MISSING
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    identities.clear()
+
+def _get(client, path):
+    # A fresh context, so Flask-Login loads the user again instead of reusing the one kept in g
+    return contextvars.Context().run(client.get, path)
+
+def test_a_changed_user_row_drops_the_cached_identity(client, owner):
+    assert b'owner' in _get(client, '/dashboard').data
+    assert identities.get(owner) == Identity(owner, 'owner', 'owner@example.com')
+
+    db.session.get(User, owner).username = 'landlord'
+    db.session.commit()
+    assert identities.get(owner) is MISSING
+    assert b'landlord' in _get(client, '/dashboard').data
+
+def test_a_rolled_back_change_keeps_the_cached_identity(client, owner):
+    _get(client, '/dashboard')
+    db.session.get(User, owner).username = 'landlord'
+    db.session.flush()
+    db.session.rollback()
+    assert identities.get(owner).username == 'owner'
+
+def test_logging_out_drops_the_cached_identity(client, owner):
+    _get(client, '/dashboard')
+    assert identities.get(owner) is not MISSING
+
+    assert _get(client, '/auth/logout').status_code == 302
+    assert identities.get(owner) is MISSING
+    assert _get(client, '/dashboard').status_code == 302
+
+def test_a_deleted_user_is_logged_out(client, owner):
+    _get(client, '/dashboard')
+    db.session.delete(db.session.get(User, owner))
+    db.session.commit()
+    assert _get(client, '/dashboard').status_code == 302
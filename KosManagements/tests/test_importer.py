@@ -0,0 +1,62 @@
+import io
+
+from sqlalchemy import select
+from app import db
+from models import Room, Tenant
+from importer import import_csv
+
+def _csv(*lines, header='name,room_number,start_date'):
+    return io.BytesIO('\n'.join((header,) + lines).encode())
+
+def test_tenants_are_not_imported_into_occupied_rooms(app, owner):
+    occupied = Room(number='101', monthly_rent=300, status='occupied', user_id=owner)
+    db.session.add_all([occupied, Room(number='102', monthly_rent=300, user_id=owner)])
+    db.session.commit()
+
+    result = import_csv('tenants', _csv('Ann,101,2024-01-01', 'Ben,102,2024-01-01'), owner)
+
+    assert result.created == 0
+    assert result.errors == [(2, 'Room 101 is already occupied')]
+    assert db.session.scalars(select(Tenant.name)).all() == []
+
+def test_a_room_is_only_let_once_per_file(app, owner):
+    db.session.add(Room(number='101', monthly_rent=300, user_id=owner))
+    db.session.commit()
+
+    result = import_csv('tenants', _csv('Ann,101,2024-01-01', 'Ben,101,2024-01-01'), owner, batch_size=1)
+
+    assert result.errors == [(3, 'Room 101 is already occupied')]
+    # Ann's batch was inserted and the room marked occupied before Ben's line failed; both are rolled back
+    assert db.session.scalars(select(Tenant.name)).all() == []
+    assert db.session.scalar(select(Room.status)) == 'available'
+
+def test_a_clean_file_is_imported_across_batches(app, owner):
+    db.session.add_all([Room(number='101', monthly_rent=300, user_id=owner),
+                        Room(number='102', monthly_rent=300, user_id=owner)])
+    db.session.commit()
+
+    result = import_csv('tenants', _csv('Ann,101,2024-01-01', 'Ben,102,2024-01-01'), owner, batch_size=1)
+
+    assert (result.created, result.errors) == (2, [])
+    assert db.session.scalars(select(Tenant.name).order_by(Tenant.name)).all() == ['Ann', 'Ben']
+    assert set(db.session.scalars(select(Room.status))) == {'occupied'}
+
+def test_a_rejected_upload_saves_nothing_and_says_so(client, owner):
+    rooms = _csv('101,,300,available', '102,,-5,available', '103,,300,available',
+                 header='number,description,monthly_rent,status')
+    response = client.post('/import/rooms', data={'file': (rooms, 'rooms.csv')})
+
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert 'Nothing imported: 1 row(s) rejected.' in page and 'Nothing was saved' in page
+    assert db.session.scalars(select(Room.number)).all() == []
+
+    rooms = _csv('101,,300,available', '103,,300,available', header='number,description,monthly_rent,status')
+    response = client.post('/import/rooms', data={'file': (rooms, 'rooms.csv')})
+
+    assert 'Imported 2 rooms.' in response.get_data(as_text=True)
+    assert db.session.scalars(select(Room.number).order_by(Room.number)).all() == ['101', '103']
+
+def test_unknown_import_kinds_are_not_found(client):
+    assert client.get('/import/expenses').status_code == 404
+    assert client.get('/import/payments').status_code == 200
@@ -0,0 +1,57 @@
+import logging
+import re
+
+from sqlalchemy import event
+from app import db
+from models import Room
+
+def _server_timing(response):
+    return dict(value.split(';', 1) for value in response.headers.getlist('Server-Timing'))
+
+def _count_queries(client, path):
+    executed = []
+    listener = lambda *args: executed.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return response, executed
+
+def test_server_timing_reports_the_request_queries(app, client):
+    response, executed = _count_queries(client, '/rooms')
+
+    assert response.status_code == 200
+    timing = _server_timing(response)
+    db_timing = re.fullmatch(r'dur=([\d.]+);desc="(\d+) queries"', timing['db'])
+    assert db_timing and int(db_timing.group(2)) == len(executed) > 0
+    app_ms = float(re.fullmatch(r'dur=([\d.]+)', timing['app']).group(1))
+    assert float(db_timing.group(1)) <= app_ms
+
+def test_server_timing_can_be_turned_off(app, client):
+    app.config['SERVER_TIMING'] = False
+
+    assert 'Server-Timing' not in client.get('/rooms').headers
+
+def test_repeated_statements_are_logged_as_possible_n_plus_one(app, client, owner, caplog):
+    app.config['N_PLUS_ONE_THRESHOLD'] = 2
+    db.session.add_all(Room(number=str(100 + i), monthly_rent=100, user_id=owner) for i in range(3))
+    db.session.commit()
+
+    with app.test_request_context('/rooms'):
+        app.preprocess_request()
+        for room in db.session.query(Room).all():
+            db.session.get(Room, room.id, populate_existing=True)
+        with caplog.at_level(logging.WARNING, logger='instrumentation'):
+            app.process_response(app.response_class())
+
+    warnings = [record.getMessage() for record in caplog.records if 'Possible N+1' in record.getMessage()]
+    assert len(warnings) == 1 and 'ran 3 times' in warnings[0]
+
+def test_slow_queries_are_logged(app, client, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING, logger='instrumentation'):
+        client.get('/rooms')
+
+    assert any(record.getMessage().startswith('Slow query') and 'rooms.index' in record.getMessage()
+               for record in caplog.records)
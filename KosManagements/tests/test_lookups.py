@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from app import db
+from models import Room, Tenant
+from forms import TenantForm
+from lookups import find_room
+import search
+
+@pytest.fixture
+def rooms(app, owner, stranger):
+    search.install(db.session.connection())
+    rooms = {}
+    for number, user_id, status in [('AB12', owner, 'available'), ('ab3', owner, 'available'), ('xab', owner, 'available'),
+                                     ('AB9', owner, 'occupied'), ('AB7', stranger, 'available')]:
+        rooms[number] = Room(number=number, monthly_rent=300, status=status, user_id=user_id)
+        db.session.add(rooms[number])
+    db.session.flush()
+    for name, room, user_id in [('Budi', 'AB9', owner), ('budiman', 'AB9', owner), ('Abudi', 'AB9', owner),
+                                ('Budiarto', 'AB7', stranger)]:
+        db.session.add(Tenant(name=name, start_date=date(2024, 1, 1), room_id=rooms[room].id, user_id=user_id))
+    db.session.commit()
+    return {number: room.id for number, room in rooms.items()}
+
+def _labels(response):
+    return [result['label'] for result in response.get_json()['results']]
+
+def test_room_typeahead_is_a_case_insensitive_prefix_match(client, rooms):
+    assert _labels(client.get('/api/typeahead/rooms?q=aB')) == ['Room AB12 - $300.0', 'Room ab3 - $300.0']
+    assert _labels(client.get('/api/typeahead/rooms?q=ab&limit=1')) == ['Room AB12 - $300.0']
+
+def test_tenant_typeahead_is_a_case_insensitive_prefix_match(client, rooms):
+    assert _labels(client.get('/api/typeahead/tenants?q=BUD')) == ['Budi - Room AB9', 'budiman - Room AB9']
+
+def _form(app, owner, room_id):
+    with app.test_request_context(method='POST'):
+        form = TenantForm(MultiDict({'name': 'Ann', 'start_date': '2024-01-01', 'room_id': str(room_id)}))
+        form.room_id.lookup = lambda value: find_room(owner, value)
+        return form.validate(), form
+
+def test_a_room_of_another_owner_fails_validation(app, owner, rooms):
+    valid, form = _form(app, owner, rooms['AB7'])
+    assert not valid
+    assert form.room_id.errors == ['Not a valid choice.']
+
+def test_an_occupied_room_fails_validation(app, owner, rooms):
+    assert not _form(app, owner, rooms['AB9'])[0]
+
+def test_a_valid_room_re_renders_its_label(app, owner, rooms):
+    valid, form = _form(app, owner, rooms['xab'])
+    assert valid
+    assert form.room_id.choices == [(rooms['xab'], 'Room xab - $300.0')]
+    assert f'<option selected value="{rooms["xab"]}">Room xab - $300.0</option>' in form.room_id()
+
+def test_new_tenant_route_rejects_another_owners_room(client, rooms):
+    response = client.post('/tenants/new', data={'name': 'Ann', 'start_date': '2024-01-01', 'room_id': rooms['AB7']})
+    assert response.status_code == 200
+    assert b'Not a valid choice.' in response.data
+    assert db.session.scalar(select(Tenant.id).where(Tenant.name == 'Ann')) is None
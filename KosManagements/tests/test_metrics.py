@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from app import create_app, db
+from routing import REPLICA_BIND
+from metrics import TimedQueuePool, POOL_TIMEOUTS
+
+TOKEN = {'Authorization': 'Bearer s3cret'}
+
+@pytest.fixture
+def replicated(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+        "METRICS_TOKEN": "s3cret",
+        "DB_POOL_SIZE": 1,
+        "DB_MAX_OVERFLOW": 0,
+        "DB_POOL_TIMEOUT": 0,
+        "TESTING": True,
+    })
+    try:
+        with app.app_context():
+            yield app
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+    finally:
+        # The shared db object keeps a metadata per bind key it has seen, which other apps' create_all() would use
+        db.metadatas.pop(REPLICA_BIND, None)
+
+def test_pool_metrics_cover_every_bind(replicated):
+    client = replicated.test_client()
+    assert all(isinstance(engine.pool, TimedQueuePool) for engine in db.engines.values())
+    db.session.execute(text('SELECT 1'))
+    db.session.remove()
+    body = client.get('/metrics', headers=TOKEN).get_data(as_text=True)
+
+    for bind in ('default', 'replica'):
+        assert f'kos_db_pool_size{{bind="{bind}"}} 1' in body
+        assert f'kos_db_pool_checked_out{{bind="{bind}"}} 0' in body
+    for name in ('kos_db_pool_checkout_wait_seconds', 'kos_db_pool_hold_seconds', 'kos_db_connect_seconds'):
+        assert f'{name}_count{{bind="default"}}' in body
+
+def _timeouts(bind):
+    return dict((tuple(key), value) for key, value in POOL_TIMEOUTS.samples()).get((bind,), 0)
+
+def test_checkout_timeouts_are_counted_per_bind(replicated):
+    replica = db.engines[REPLICA_BIND]
+    before = _timeouts('replica')
+    with replica.connect():
+        with pytest.raises(PoolTimeout):
+            replica.connect()
+    # Recreating the pool keeps its label
+    replica.dispose()
+    with replica.connect():
+        with pytest.raises(PoolTimeout):
+            replica.connect()
+    assert _timeouts('replica') - before == 2
+
+def test_metrics_need_the_configured_token(replicated):
+    client = replicated.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    replicated.config['METRICS_TOKEN'] = None
+    assert client.get('/metrics', headers=TOKEN).status_code == 403
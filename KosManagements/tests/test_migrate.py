@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from sqlalchemy import inspect
+from app import db
+from models import Room, Tenant, Payment
+import migrate
+
+def _columns(table):
+    return {column['name'] for column in inspect(db.session.connection()).get_columns(table)}
+
+def _on_delete(table, column):
+    fks = inspect(db.session.connection()).get_foreign_keys(table)
+    return next(fk['options'].get('ondelete') for fk in fks if fk['constrained_columns'] == [column])
+
+def _indexes(table):
+    return {index['name'] for index in inspect(db.session.connection()).get_indexes(table)}
+
+def test_upgrade_downgrade_round_trip_on_a_fresh_database(app, owner):
+    assert migrate.upgrade() == [version for version, _, _ in migrate.load_migrations()]
+    room = Room(number='101', monthly_rent=300, user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    tenant = Tenant(name='Ann', start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+    db.session.add(tenant)
+    db.session.flush()
+    db.session.add(Payment(amount=300, due_date=date(2024, 1, 1), room_id=room.id, tenant_id=tenant.id, user_id=owner))
+    db.session.commit()
+
+    indexes = _indexes('tenant')
+    assert _on_delete('payment', 'tenant_id') == 'CASCADE'
+
+    migrate.downgrade('0004')
+    assert _on_delete('payment', 'tenant_id') is None
+    assert _indexes('tenant') == indexes
+    migrate.downgrade('0000')
+    assert migrate.applied_versions() == set()
+    assert 'user_id' not in _columns('tenant') | _columns('payment')
+    conn = db.session.connection()
+    assert conn.exec_driver_sql('PRAGMA integrity_check').scalar() == 'ok'
+    assert conn.exec_driver_sql('SELECT name FROM tenant').scalars().all() == ['Ann']
+    # Rebuilding tenant must not have cascaded to its payments
+    assert conn.exec_driver_sql('SELECT count(*) FROM payment').scalar() == 1
+    db.session.commit()
+
+    migrate.upgrade()
+    assert db.session.scalar(db.select(Tenant.user_id)) == owner
+    assert _on_delete('payment', 'tenant_id') == 'CASCADE'
+    assert db.session.connection().exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+
+def test_a_rebuild_refuses_to_run_with_foreign_keys_on(app):
+    with pytest.raises(RuntimeError):
+        migrate.rebuild_table(db.session.connection(), 'tenant', lambda sql: sql)
+
+def test_a_migration_leaving_broken_foreign_keys_is_rolled_back(app, owner):
+    def orphan(conn):
+        conn.exec_driver_sql("INSERT INTO tenant (name, start_date, room_id, user_id) VALUES ('Ghost', '2024-01-01', 99, 1)")
+    with pytest.raises(RuntimeError):
+        migrate._run(orphan, lambda conn: None)
+    assert db.session.connection().exec_driver_sql('SELECT count(*) FROM tenant').scalar() == 0
@@ -0,0 +1,40 @@
+from datetime import date
+
+from app import db
+from models import Room, Tenant
+from occupancy import compute_occupancy, trailing_occupancy
+
+def test_counts_merged_tenancies_once():
+    rooms = [(1, '101', 310.0, date(2024, 1, 1))]
+    tenancies = [(1, date(2024, 1, 1), date(2024, 1, 10)), (1, date(2024, 1, 5), date(2024, 1, 20))]
+    report = compute_occupancy(rooms, tenancies, date(2024, 1, 1), date(2024, 2, 1))
+    assert report.room_days == 31
+    assert report.occupied_days == 20
+    assert report.rooms[0].vacancy_days == 11
+    assert report.lost_rent == 110.0
+
+def test_same_day_reletting_with_open_tenancy():
+    today = date(2024, 3, 15)
+    rooms = [(1, '101', 300.0, date(2024, 1, 1))]
+    # A tenant moved in and out today, and the next one moved in the same day
+    tenancies = [(1, today, None), (1, today, today)]
+    report = compute_occupancy(rooms, tenancies, date(2024, 3, 1), date(2024, 4, 1), 'day')
+    assert report.occupied_days == 17
+    assert report.rooms[0].occupied_days == 17
+
+def test_dashboard_after_reletting_a_room_the_same_day(client, owner):
+    today = date.today()
+    room = Room(number='101', monthly_rent=300, status='occupied', user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    db.session.add_all([
+        Tenant(name='Gone', start_date=today, end_date=today, is_active=False, room_id=room.id, user_id=owner),
+        Tenant(name='New', start_date=today, room_id=room.id, user_id=owner),
+    ])
+    db.session.commit()
+
+    assert client.get('/dashboard').status_code == 200
+    response = client.get('/api/reports/occupancy')
+    assert response.status_code == 200
+    assert response.json['occupied_days'] >= 1
+    assert trailing_occupancy(owner).rooms[0].vacancy_days >= 0
@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import select, insert
+from app import db
+from models import Room, Tenant, Payment
+from pagination import keyset_paginate, encode_cursor, decode_cursor, InvalidCursor
+
+@pytest.fixture
+def payments(app, owner):
+    room = Room(number='101', monthly_rent=300, user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    tenant = Tenant(name='Ann', start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+    db.session.add(tenant)
+    db.session.flush()
+    # Ten payments share each due date, so pages must break ties on id
+    db.session.execute(insert(Payment), [
+        {'amount': 100 + i, 'due_date': date(2024, 1 + i % 4, 1), 'status': 'pending',
+         'room_id': room.id, 'tenant_id': tenant.id, 'user_id': owner}
+        for i in range(40)
+    ])
+    db.session.commit()
+    return db.session.execute(
+        select(Payment.id).order_by(Payment.due_date.desc(), Payment.id.desc())
+    ).scalars().all()
+
+def _page(owner, cursor=None):
+    stmt = select(Payment).where(Payment.user_id == owner)
+    return keyset_paginate(stmt, Payment.due_date, Payment.id, cursor=cursor, per_page=7)
+
+def test_walking_forward_and_back_visits_every_row_once(owner, payments):
+    forward = [_page(owner)]
+    while forward[-1].has_next:
+        forward.append(_page(owner, forward[-1].next_cursor))
+    assert [p.id for page in forward for p in page.items] == payments
+    assert not forward[0].has_prev
+
+    backward = [forward[-1]]
+    while backward[-1].has_prev:
+        backward.append(_page(owner, backward[-1].prev_cursor))
+    assert [[p.id for p in page.items] for page in reversed(backward)] == [[p.id for p in page.items] for page in forward]
+
+def test_cursor_round_trips():
+    token = encode_cursor(date(2024, 2, 1), 17, 'prev')
+    assert decode_cursor(token) == (date(2024, 2, 1), 17, 'prev')
+
+def _token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    _token(['2024-02-01', 17, 'sideways']),
+    _token(['2024-02-30', 17, 'next']),
+    _token(['2024-02-01', None, 'next']),
+    _token(['2024-02-01', 17]),
+    _token({'due': '2024-02-01'}),
+])
+def test_tampered_cursors_are_rejected(client, payments, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+    assert client.get('/payments', query_string={'cursor': cursor}).status_code == 400
+
+def test_ledger_pages_through_a_cursor(client, owner, payments):
+    first = client.get('/payments')
+    assert first.status_code == 200
+    cursor = _page(owner).next_cursor
+    assert client.get('/payments', query_string={'cursor': cursor}).status_code == 200
@@ -0,0 +1,134 @@
+import socketserver
+import threading
+import time
+from datetime import date, datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+from sqlalchemy import select, func
+
+from app import db
+from models import Room, Tenant, Payment, ReminderOutbox
+from reminders import enqueue_reminders, dispatch_reminders, claim_batch, LEASE
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server on localhost to receive what the dispatcher sends"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, refused=()):
+        super().__init__(('127.0.0.1', 0), SmtpHandler)
+        self.refused = set(refused)
+        self.messages = []
+        self.lock = threading.Lock()
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost ESMTP')
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                self.reply('550 No such user' if address in self.server.refused else '250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while (data := self.rfile.readline()) != b'.\r\n':
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                with self.server.lock:
+                    self.server.messages.append(message_from_bytes(b''.join(lines)))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:  # MAIL, RSET, NOOP
+                self.reply('250 OK')
+
+@pytest.fixture
+def smtp(app):
+    server = SmtpStandIn(refused={'refused@example.com'})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.config.update(REMINDER_SMTP_HOST='127.0.0.1', REMINDER_SMTP_PORT=server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def add_overdue_tenants(owner, emails):
+    room = Room(number='101', monthly_rent=100, status='occupied', user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    for email in emails:
+        tenant = Tenant(name=email.split('@')[0], email=email, start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+        db.session.add(tenant)
+        db.session.flush()
+        db.session.add(Payment(amount=100, due_date=date.today() - timedelta(days=5), status='overdue',
+                               room_id=room.id, tenant_id=tenant.id, user_id=owner))
+    db.session.commit()
+    return enqueue_reminders()
+
+def statuses():
+    return dict(db.session.execute(select(ReminderOutbox.status, func.count()).group_by(ReminderOutbox.status)).all())
+
+def test_dispatch_delivers_over_smtp(app, owner, smtp):
+    assert add_overdue_tenants(owner, ['a@example.com', 'b@example.com']) == 2
+
+    assert dispatch_reminders(rate_limits={}) == (2, 0)
+    assert sorted(message['To'] for message in smtp.messages) == ['a@example.com', 'b@example.com']
+    assert all(message['Subject'] == 'Rent payment overdue' for message in smtp.messages)
+    assert statuses() == {'sent': 2}
+
+def test_refused_recipient_is_retried_later(app, owner, smtp):
+    add_overdue_tenants(owner, ['a@example.com', 'refused@example.com'])
+
+    assert dispatch_reminders(rate_limits={}) == (1, 0)
+    refused = db.session.scalars(select(ReminderOutbox).where(ReminderOutbox.recipient == 'refused@example.com')).one()
+    assert refused.status == 'queued'
+    assert refused.attempts == 1
+    assert refused.last_error
+    assert refused.next_attempt_at > datetime.utcnow()
+
+def test_concurrent_dispatchers_send_each_message_once(app, owner, smtp):
+    emails = [f'tenant{i}@example.com' for i in range(24)]
+    add_overdue_tenants(owner, emails)
+    start = threading.Barrier(2)
+    results, errors = [], []
+
+    def run():
+        with app.app_context():
+            try:
+                start.wait()
+                results.append(dispatch_reminders(workers=2, rate_limits={}, batch_size=3))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sum(sent for sent, _ in results) == 24
+    assert sorted(message['To'] for message in smtp.messages) == sorted(emails)
+    assert statuses() == {'sent': 24}
+
+def test_claim_leases_from_claim_time(app, owner):
+    add_overdue_tenants(owner, ['a@example.com'])
+    started = datetime.utcnow()
+    time.sleep(0.05)
+
+    claimed = claim_batch(due_before=started + timedelta(seconds=1))
+    assert len(claimed) == 1
+    lease_end = db.session.scalar(select(ReminderOutbox.next_attempt_at))
+    assert lease_end >= started + LEASE + timedelta(seconds=0.05)
+    # Leased rows are not claimed again until the lease runs out
+    assert claim_batch(due_before=started + timedelta(seconds=1)) == []
@@ -0,0 +1,44 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event, select
+from app import db
+from models import Expense, JobRun, MonthlyRollup
+from reports import ROLLUP_JOB, refresh_rollups
+
+MONTH = date(2024, 3, 1)
+
+@pytest.fixture
+def rollups(app):
+    db.session.add(JobRun(name=ROLLUP_JOB, last_run_at=datetime.utcnow()))
+    db.session.commit()
+
+def test_refresh_survives_a_concurrent_insert_of_the_same_month(app, owner, rollups):
+    db.session.add(Expense(description='Paint', amount=40, category='repairs', date=MONTH, user_id=owner))
+    db.session.commit()
+    db.session.execute(db.delete(MonthlyRollup))
+    connection = db.session.connection()
+    raced = []
+
+    def other_writer(conn, cursor, statement, parameters, context, executemany):
+        # Another transaction commits the month's row just before this one writes it
+        if statement.startswith('INSERT INTO monthly_rollup') and not raced:
+            raced.append(statement)
+            cursor.execute('INSERT INTO monthly_rollup (user_id, month, revenue, expenses) VALUES (?, ?, 0, 1)',
+                           (owner, MONTH.isoformat()))
+
+    event.listen(connection, 'before_cursor_execute', other_writer)
+    refresh_rollups(connection, {(owner, MONTH), (owner, date(2024, 4, 1))})
+    event.remove(connection, 'before_cursor_execute', other_writer)
+
+    assert db.session.execute(select(MonthlyRollup.month, MonthlyRollup.expenses)).all() == [(MONTH, 40.0)]
+
+def test_refresh_removes_months_left_empty(app, owner, rollups):
+    db.session.add(MonthlyRollup(user_id=owner, month=MONTH, revenue=10, expenses=0))
+    db.session.commit()
+    refresh_rollups(db.session.connection(), {(owner, MONTH)})
+    assert db.session.scalars(select(MonthlyRollup.month)).all() == []
+
+@pytest.mark.parametrize('year, status', [('0', 400), ('9999', 400), ('-1', 400), ('2024', 200), ('x', 200)])
+def test_financial_report_rejects_years_out_of_range(client, year, status):
+    assert client.get(f'/reports/financial?year={year}').status_code == status
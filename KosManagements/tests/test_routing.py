@@ -0,0 +1,81 @@
+import pytest
+from flask import g
+from sqlalchemy import select, insert, text
+from app import create_app, db, sqlite_pragmas
+from models import User, Room
+from routing import REPLICA_BIND
+
+@pytest.fixture
+def replicated(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+    })
+    try:
+        with app.app_context():
+            user = {'id': 1, 'username': 'owner', 'email': 'owner@example.com', 'password_hash': 'x'}
+            for name, engine in (('primary', db.engine), ('replica', db.engines[REPLICA_BIND])):
+                db.metadata.create_all(engine)
+                with engine.begin() as conn:
+                    conn.execute(insert(User), user)
+                    conn.execute(insert(Room), {'number': f'{name}-101', 'monthly_rent': 100,
+                                                'status': 'available', 'user_id': 1})
+        yield app
+    finally:
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        # The shared db object keeps a metadata per bind key it has seen, which other apps' create_all() would use
+        db.metadatas.pop(REPLICA_BIND, None)
+
+@pytest.fixture
+def replica_client(replicated):
+    client = replicated.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+        session["_fresh"] = True
+    return client
+
+def _room_numbers(engine):
+    with engine.connect() as conn:
+        return conn.scalars(select(Room.number).order_by(Room.number)).all()
+
+def test_read_only_views_read_from_the_replica(replica_client):
+    page = replica_client.get('/rooms').get_data(as_text=True)
+
+    assert 'replica-101' in page and 'primary-101' not in page
+
+def test_writes_go_to_the_primary(replicated, replica_client):
+    response = replica_client.post('/rooms/new', data={'number': '102', 'monthly_rent': 150, 'status': 'available'})
+
+    assert response.status_code == 302
+    with replicated.app_context():
+        assert _room_numbers(db.engine) == ['102', 'primary-101']
+        assert _room_numbers(db.engines[REPLICA_BIND]) == ['replica-101']
+
+def test_a_read_only_request_sticks_to_the_primary_after_writing(replicated):
+    with replicated.test_request_context('/rooms'):
+        g.read_only = True
+        assert db.session.scalars(select(Room.number)).all() == ['replica-101']
+        db.session.add(Room(number='103', monthly_rent=100, user_id=1))
+        db.session.flush()
+        assert db.session.scalars(select(Room.number).order_by(Room.number)).all() == ['103', 'primary-101']
+        db.session.rollback()
+
+def test_the_production_profile_sets_the_sqlite_pragmas(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'prod.db'}", "SQLITE_PROFILE": "production"})
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                values = {name: conn.execute(text(f'PRAGMA {name}')).scalar() for name in sqlite_pragmas(app.config)}
+        finally:
+            db.engine.dispose()
+
+    assert values == {**sqlite_pragmas(app.config), 'journal_mode': 'wal', 'synchronous': 1}  # NORMAL reads back as 1
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_pre_ping'] is False
+
+def test_other_profiles_leave_sqlite_defaults(app):
+    with db.engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
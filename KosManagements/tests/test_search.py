@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+from app import db
+from models import Room, Tenant
+import search
+
+@pytest.fixture
+def indexed(app):
+    search.install(db.session.connection())
+    db.session.commit()
+
+def _tenants(owner, room_id, rows):
+    db.session.execute(insert(Tenant), [
+        {'name': name, 'email': email, 'start_date': date(2024, 1, 1), 'room_id': room_id, 'user_id': owner}
+        for name, email in rows
+    ])
+    db.session.commit()
+
+def test_an_older_better_match_outranks_many_newer_ones(app, owner, indexed):
+    room = Room(number='101', monthly_rent=300, user_id=owner)
+    db.session.add(room)
+    db.session.commit()
+    _tenants(owner, room.id, [('Budi Santoso', None)])
+    _tenants(owner, room.id, [(f'Tenant {i}', f'budi{i}@mail.com') for i in range(600)])
+
+    first = search.search(owner, 'budi')
+    assert first.items[0].values['name'] == 'Budi Santoso'
+    assert first.has_next
+
+    seen, page = [], first
+    while True:
+        seen += [(hit.kind, hit.id) for hit in page.items]
+        if not page.has_next:
+            break
+        page = search.search(owner, 'budi', page=page.next_num)
+    assert len(seen) == len(set(seen)) == 601
+
+def test_results_are_merged_across_kinds_and_scoped_to_the_owner(client, owner, stranger, indexed):
+    room = Room(number='12', description='Corner room near Melati street', monthly_rent=300, user_id=owner)
+    other = Room(number='13', description='Melati', monthly_rent=300, user_id=stranger)
+    db.session.add_all([room, other])
+    db.session.commit()
+    _tenants(owner, room.id, [('Melati', 'melati@mail.com')])
+
+    hits = search.search(owner, 'mela').items
+    assert hits[0].kind == 'tenant'
+    assert {hit.kind for hit in hits} == {'tenant', 'room'}
+    assert [hit.values['number'] for hit in search.search(owner, 'melati', [search.KINDS_BY_NAME['room']]).items] == ['12']
+    assert client.get('/search?q=melati').status_code == 200
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import pytest
+from app import db
+from models import Room, Tenant, Payment
+from stats import get_dashboard_stats, DashboardStats
+
+TODAY = date(2024, 3, 15)
+
+def _portfolio(user_id, payments):
+    rooms = [Room(number=str(100 + i), monthly_rent=100, status=status, user_id=user_id)
+             for i, status in enumerate(['occupied', 'occupied', 'available', 'available'])]
+    db.session.add_all(rooms)
+    db.session.flush()
+    tenants = [Tenant(name='Active', start_date=date(2024, 1, 1), room_id=rooms[0].id, user_id=user_id),
+               Tenant(name='Active', start_date=date(2024, 1, 1), room_id=rooms[1].id, user_id=user_id),
+               Tenant(name='Gone', start_date=date(2023, 1, 1), end_date=date(2023, 12, 31), is_active=False,
+                      room_id=rooms[2].id, user_id=user_id)]
+    db.session.add_all(tenants)
+    db.session.flush()
+    for amount, status, due_date, paid_date in payments:
+        db.session.add(Payment(amount=amount, status=status, due_date=due_date, paid_date=paid_date,
+                               room_id=rooms[0].id, tenant_id=tenants[0].id, user_id=user_id))
+    db.session.commit()
+
+@pytest.fixture
+def portfolio(app, owner, stranger):
+    _portfolio(owner, [
+        (100, 'paid', date(2024, 3, 5), date(2024, 3, 1)),  # paid this month
+        (40, 'paid', date(2024, 2, 5), date(2024, 2, 28)),  # paid last month
+        (70, 'pending', TODAY, None),  # due today is not late yet
+        (80, 'pending', TODAY - timedelta(days=1), None),  # not yet swept, but late
+        (90, 'overdue', date(2024, 1, 5), None),
+    ])
+    # Another owner's numbers must not leak into the first owner's
+    _portfolio(stranger, [(500, 'paid', TODAY, TODAY), (500, 'pending', TODAY, None)])
+
+def test_dashboard_numbers(portfolio, owner):
+    stats = get_dashboard_stats(owner, today=TODAY)
+
+    assert stats == DashboardStats(total_rooms=4, occupied_rooms=2, total_tenants=2, monthly_revenue=100.0,
+                                   pending_payments=1, overdue_payments=2)
+    assert stats.available_rooms == 2
+    assert stats.occupancy_rate == 50.0
+
+def test_an_owner_without_records_gets_zeros(app, owner):
+    stats = get_dashboard_stats(owner, today=TODAY)
+
+    assert stats.to_dict() == {'total_rooms': 0, 'occupied_rooms': 0, 'total_tenants': 0, 'monthly_revenue': 0.0,
+                               'pending_payments': 0, 'overdue_payments': 0, 'available_rooms': 0,
+                               'occupancy_rate': 0}
+
+def test_the_stats_endpoint_serves_the_same_numbers(portfolio, owner, client):
+    data = client.get('/api/dashboard/stats').json
+
+    assert data['total_rooms'] == 4 and data['total_tenants'] == 2
+    assert data == get_dashboard_stats(owner).to_dict()
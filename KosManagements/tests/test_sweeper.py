@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from app import db
+from models import Room, Tenant, Payment
+from sweeper import run_overdue_sweep, sweep_if_due, last_sweep
+
+def _payments(owner, *rows):
+    room = Room(number='101', monthly_rent=100, status='occupied', user_id=owner)
+    db.session.add(room)
+    db.session.flush()
+    tenant = Tenant(name='T', start_date=date(2024, 1, 1), room_id=room.id, user_id=owner)
+    db.session.add(tenant)
+    db.session.flush()
+    for notes, status, due_date in rows:
+        db.session.add(Payment(amount=100, due_date=due_date, status=status, notes=notes,
+                               paid_date=due_date if status == 'paid' else None,
+                               room_id=room.id, tenant_id=tenant.id, user_id=owner))
+    db.session.commit()
+
+def _statuses():
+    db.session.expire_all()
+    return dict(db.session.execute(select(Payment.notes, Payment.status)).all())
+
+def test_only_pending_payments_past_due_become_overdue(app, owner):
+    today = date.today()
+    _payments(owner,
+              ('late', 'pending', today - timedelta(days=1)),
+              ('due today', 'pending', today),
+              ('upcoming', 'pending', today + timedelta(days=5)),
+              ('paid late', 'paid', today - timedelta(days=40)),
+              ('already overdue', 'overdue', today - timedelta(days=60)))
+
+    assert run_overdue_sweep() == 1
+    assert _statuses() == {'late': 'overdue', 'due today': 'pending', 'upcoming': 'pending',
+                           'paid late': 'paid', 'already overdue': 'overdue'}
+    assert last_sweep().rows_affected == 1
+    assert run_overdue_sweep() == 0
+
+def test_a_recent_sweep_is_not_repeated(app, owner):
+    _payments(owner, ('late', 'pending', date.today() - timedelta(days=1)))
+
+    assert sweep_if_due() == 1
+    _payments(owner, ('later', 'pending', date.today() - timedelta(days=2)))
+    assert sweep_if_due() is None
+    assert _statuses()['later'] == 'pending'
+    assert sweep_if_due(interval=0) == 1
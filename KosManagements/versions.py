@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from flask import request, g, has_app_context, has_request_context
+from sqlalchemy import select, update, insert, event
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from app import db
+from models import DataVersion
+from cache import OWNED_MODELS, owners_of
+
+GLOBAL = 0
+
+def bump_versions(connection, user_ids):
+    """Increment the durable data version of each owner inside the current transaction"""
+    now = datetime.utcnow().replace(microsecond=0)
+    for user_id in user_ids:
+        result = connection.execute(
+            update(DataVersion)
+            .where(DataVersion.user_id == user_id)
+            .values(version=DataVersion.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(DataVersion).values(user_id=user_id, version=1, updated_at=now))
+    if has_app_context():
+        g.pop('data_versions', None)
+
+def data_version(user_id):
+    """Return (etag, last_modified) for one owner's data, including bulk changes.
+
+    Remembered for the rest of the request, until this process bumps a version.
+    """
+    memo = g.setdefault('data_versions', {}) if has_request_context() else {}
+    if user_id in memo:
+        return memo[user_id]
+    rows = db.session.execute(
+        select(DataVersion.user_id, DataVersion.version, DataVersion.updated_at)
+        .where(DataVersion.user_id.in_((user_id, GLOBAL)))
+    ).all()
+    versions = {row.user_id: row for row in rows}
+    owner, bulk = versions.get(user_id), versions.get(GLOBAL)
+    etag = f'{user_id}.{owner.version if owner else 0}.{bulk.version if bulk else 0}'
+    stamps = [row.updated_at for row in rows]
+    memo[user_id] = etag, max(stamps) if stamps else None
+    return memo[user_id]
+
+def is_not_modified(etag, last_modified):
+    """True when the request's validators still match, so a 304 can be sent"""
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_owners(session, flush_context):
+    owners = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, OWNED_MODELS) and (obj not in session.dirty or session.is_modified(obj)):
+            owners |= owners_of(obj)
+    if owners:
+        bump_versions(session.connection(), sorted(owners))